@@ -60,8 +60,8 @@ def embed_thumbnails(
         # Use Inkscape to render each build step
         build_elements = find_build_elements(svg)
         output_filenames = {}
-        with open_etree_in_inkscape(inkscape, svg):
-            for step in get_build_step_range(svg):
+        with open_etree_in_inkscape(inkscape, svg, tmp_path):
+            for step in get_build_step_range(svg, build_elements):
                 set_visible_step(inkscape, build_elements, step)
 
                 # Generate thumbnail
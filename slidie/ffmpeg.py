@@ -4,7 +4,14 @@ Wrappers around specific ffmpeg functionality.
 
 import os
 from pathlib import Path
-from subprocess import run, PIPE, STDOUT
+from subprocess import run
+
+
+_IMAGE_SUFFIXES = {".png": False, ".jpg": True, ".jpeg": True}
+"""
+The image file suffixes supported by :py:func:`extract_video_frame`, mapped
+to whether the file is a JPEG (rather than a PNG).
+"""
 
 
 class FrameExtractionError(Exception):
@@ -13,15 +20,15 @@ class FrameExtractionError(Exception):
     """
 
 
-def extract_video_frame(
+def extract_video_frame_bytes(
     video: Path | str,
-    out: Path,
     time: float = 10.0,
     cwd: Path | None = None,
-) -> None:
+    jpeg: bool = False,
+) -> bytes:
     """
     Extract a frame of video from a file at the approximate point in time
-    given.
+    given, returning it as PNG data (or JPEG data if 'jpeg' is True).
 
     Note the video argument may be anything which ffmpeg accepts which includes
     both local files and web URLs.
@@ -29,11 +36,6 @@ def extract_video_frame(
     The 'cwd' argument gives the working directory to run ffmpeg in. This may
     be useful if you need to open a file given using a relative path.
     """
-    # Remove existing output file (allows us to easily detect failures due to
-    # the 'time' supplied being beyond the end of the video.
-    if out.is_file():
-        out.unlink()
-
     # Attempt to grab a frame from the specified moment in time, trying 0.0 if
     # that fails.
     for actual_time in sorted({time, 0.0}, reverse=True):
@@ -51,23 +53,48 @@ def extract_video_frame(
                 # Grab a single frame
                 "-frames:v",
                 "1",
-                # Tell the output 'image2' module we're providing a fixed output
-                # filename (and not a pattern)
-                "-update",
-                "1",
-                # Overwrite any existing files
-                "-y",
-                # Specify output filename
-                str(out),
+                # Output a PNG (or high quality JPEG) to stdout (rather than a
+                # file)
+                "-f",
+                "image2pipe",
+                *(["-c:v", "mjpeg", "-q:v", "2"] if jpeg else ["-c:v", "png"]),
+                "pipe:1",
             ],
             cwd=cwd,
-            stdout=PIPE,
-            stderr=STDOUT,
-            text=True,
+            capture_output=True,
         )
-        if result.returncode == 0 and out.is_file():
+        # NB: When 'time' is beyond the end of the video ffmpeg succeeds but
+        # produces no output.
+        if result.returncode == 0 and result.stdout:
             # Success!
-            break
+            return result.stdout
+
+    raise FrameExtractionError(result.stderr.decode("utf-8", errors="replace"))
+
+
+def extract_video_frame(
+    video: Path | str,
+    out: Path,
+    time: float = 10.0,
+    cwd: Path | None = None,
+) -> None:
+    """
+    Extract a frame of video from a file at the approximate point in time
+    given, writing it to a PNG or JPEG file (chosen according to the suffix
+    of 'out', which must be '.png', '.jpg' or '.jpeg'). Raises a ValueError
+    for any other suffix.
+
+    See :py:func:`extract_video_frame_bytes` for details of the arguments.
+    """
+    suffix = out.suffix.lower()
+    if suffix not in _IMAGE_SUFFIXES:
+        raise ValueError(f"Unsupported image file type: {out.suffix!r}")
+
+    # Remove existing output file (so a stale frame is not left behind on
+    # failure)
+    if out.is_file():
+        out.unlink()
 
-    if result.returncode != 0 or not out.is_file():
-        raise FrameExtractionError(result.stdout)
+    out.write_bytes(
+        extract_video_frame_bytes(video, time, cwd=cwd, jpeg=_IMAGE_SUFFIXES[suffix])
+    )
@@ -7,11 +7,14 @@ from typing import TextIO, Self, Iterator
 from types import TracebackType
 
 import os
-from subprocess import Popen, PIPE, STDOUT
+from subprocess import Popen, PIPE, STDOUT, run
 from pathlib import Path
 from xml.etree import ElementTree as ET
 from contextlib import contextmanager
+from functools import cache
 from tempfile import TemporaryDirectory
+from threading import Lock
+from uuid import uuid4
 
 
 class InkscapeError(Exception):
@@ -26,6 +29,20 @@ class FileOpenError(InkscapeError):
     """
 
 
+@cache
+def get_inkscape_version(inkscape_binary: str = "inkscape") -> str:
+    """
+    Return the version string reported by Inkscape (e.g. "Inkscape 1.2.2
+    (b0a8486541, 2022-12-01)"). Memoised since this requires starting Inkscape.
+    """
+    return run(
+        [inkscape_binary, "--version"],
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout.strip()
+
+
 class Inkscape:
     def __init__(self, inkscape_binary: str = "inkscape"):
         self._proc = Popen(
@@ -33,8 +50,7 @@ class Inkscape:
             stdin=PIPE,
             stdout=PIPE,
             stderr=STDOUT,
-            text=True,
-            bufsize=0,
+            bufsize=-1,
             env=dict(
                 os.environ,
                 # XXX: The following variables are to try and force consistent
@@ -62,15 +78,18 @@ class Inkscape:
     def _wait_for_prompt(self) -> str:
         """
         Read from Inkscape's stdout until either a prompt is printed or the
-        stream ends. Returns the read bytes.
+        stream ends. Returns the read text.
         """
         assert self._proc.stdout  # For mypy's benefit...
-        buf = ""
+        buf = bytearray()
         while c := self._proc.stdout.read(1):
             buf += c
-            if buf.endswith("\n> "):
-                return buf
-        return buf
+            if buf.endswith(b"\n> "):
+                break
+
+        # NB: Decoded in one go (rather than byte-by-byte) once the whole
+        # response has been read.
+        return buf.decode("utf-8", errors="replace")
 
     def _run_cmd(
         self,
@@ -119,7 +138,7 @@ class Inkscape:
         if (len("> ") + len(cmd)) % 80 == 0:
             cmd += ";"
 
-        self._proc.stdin.write(f"{cmd}\n")
+        self._proc.stdin.write(f"{cmd}\n".encode("utf-8"))
         self._proc.stdin.flush()
 
         out = self._wait_for_prompt()
@@ -224,6 +243,76 @@ class Inkscape:
             InkscapeError(out)
 
 
+class InkscapePool:
+    """
+    A pool of Inkscape instances which may be shared between several threads.
+
+    Instances are started on demand (so at most as many instances are started
+    as are used concurrently) and are kept running and reused until the pool
+    is closed.
+
+    The Inkscape version (see :py:attr:`version`) may be given by the caller,
+    in which case Inkscape is never run just to find it (e.g. allowing cached
+    slides to be used without Inkscape).
+    """
+
+    def __init__(self, inkscape_binary: str = "inkscape", version: str | None = None):
+        self._inkscape_binary = inkscape_binary
+        self._version = version
+        self._lock = Lock()
+        self._idle: list[Inkscape] = []
+        self._started: list[Inkscape] = []
+
+    def __enter__(self) -> Self:
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc_val: BaseException | None,
+        exc_tb: TracebackType | None,
+    ) -> None:
+        self.close()
+
+    @property
+    def version(self) -> str:
+        """
+        The version of Inkscape used by this pool (see
+        :py:func:`get_inkscape_version`), unless given explicitly.
+        """
+        if self._version is None:
+            self._version = get_inkscape_version(self._inkscape_binary)
+        return self._version
+
+    def close(self) -> None:
+        """Terminate all Inkscape instances started by this pool."""
+        with self._lock:
+            for inkscape in self._started:
+                inkscape.__exit__(None, None, None)
+            self._started.clear()
+            self._idle.clear()
+
+    @contextmanager
+    def get(self) -> Iterator[Inkscape]:
+        """
+        Context manager which provides exclusive use of an Inkscape instance,
+        starting a new one if none are idle.
+        """
+        with self._lock:
+            inkscape = self._idle.pop() if self._idle else None
+
+        if inkscape is None:
+            inkscape = Inkscape(self._inkscape_binary)
+            with self._lock:
+                self._started.append(inkscape)
+
+        try:
+            yield inkscape
+        finally:
+            with self._lock:
+                self._idle.append(inkscape)
+
+
 def set_visible_step(
     inkscape: Inkscape,
     build_elements: dict[ET.Element, list[int]],
@@ -246,19 +335,46 @@ def set_visible_step(
 
 
 @contextmanager
-def open_etree_in_inkscape(inkscape: Inkscape, svg: ET.Element) -> Iterator[None]:
+def make_tmp_workspace() -> Iterator[Path]:
     """
-    Context manager which opens an SVG residing in an SVG element by internally
-    writing it to a temporary directory.
+    Context manager which creates a temporary directory which may be shared
+    between many calls to :py:func:`open_etree_in_inkscape` (rather than each
+    call creating and removing a temporary directory of its own).
     """
     with TemporaryDirectory() as tmp_dir:
-        input_file = Path(tmp_dir) / "input.svg"
-        with input_file.open("wb") as f:
-            ET.ElementTree(svg).write(f)
+        yield Path(tmp_dir)
+
+
+@contextmanager
+def open_etree_in_inkscape(
+    inkscape: Inkscape,
+    svg: ET.Element,
+    workspace: Path | None = None,
+) -> Iterator[None]:
+    """
+    Context manager which opens an SVG residing in an SVG element by internally
+    writing it to a temporary file.
+
+    The temporary file is written into the workspace directory, if given (e.g.
+    one created by :py:func:`make_tmp_workspace`), and removed again on exit.
+    Otherwise a temporary directory is created just for this call.
+    """
+    if workspace is None:
+        with make_tmp_workspace() as workspace:
+            with open_etree_in_inkscape(inkscape, svg, workspace):
+                yield
+        return
+
+    input_file = workspace / f"slide-{uuid4()}.svg"
+    with input_file.open("wb") as f:
+        ET.ElementTree(svg).write(f)
 
+    try:
         inkscape.file_open(input_file)
 
         try:
             yield
         finally:
             inkscape.file_close()
+    finally:
+        input_file.unlink()
@@ -13,6 +13,13 @@ from slidie.xml_namespaces import SLIDIE_NAMESPACE
 from slidie.magic import MagicText, MagicError
 
 
+_ID_BAD_FIRST = frozenset("0123456789#@<")
+"""Characters which may not start a slide ID."""
+
+_ID_BAD_REST = frozenset("#@<")
+"""Characters which may not appear anywhere in a slide ID."""
+
+
 @dataclass
 class SlideIDMagicError(MagicError):
     """Base class for errors involving slide ID magics."""
@@ -53,8 +60,12 @@ def annotate_slide_id_from_magic(magic: dict[str, list[MagicText]]) -> None:
 
     slide_id = id_magic[0].parameters
 
-    # Check ID is valid
-    if not re.fullmatch(r"[^0-9#@<][^@#<]*", slide_id):
+    # Check ID is valid (i.e. would match the slide_id group in LINK_REGEX)
+    if (
+        not slide_id
+        or slide_id[0] in _ID_BAD_FIRST
+        or any(c in _ID_BAD_REST for c in slide_id)
+    ):
         raise InvalidIdError(id_magic[0].parents, id_magic[0].text, slide_id)
 
     # Annotate SVG
@@ -9,13 +9,16 @@ an SVG document. Implementation of the "magical" functionality is deferred to
 the caller!
 """
 
-from typing import Any, NamedTuple
+from typing import Any, NamedTuple, Iterable
 
 from xml.etree import ElementTree as ET
-from collections import defaultdict
+from itertools import groupby
+from operator import itemgetter
 from dataclasses import dataclass
+from functools import lru_cache
 from textwrap import indent
 import tomllib
+import re
 
 from slidie.xml_namespaces import SVG_NAMESPACE
 from slidie.svg_utils import (
@@ -25,13 +28,33 @@ from slidie.svg_utils import (
 )
 
 
+MAGIC_PREFIX = "@@@\n"
+"""The prefix which identifies magic <text> elements."""
+
+
+_SVG_TAG_PREFIX = f"{{{SVG_NAMESPACE}}}"
+
+_MAGIC_RECTANGLE_TAGS = frozenset(
+    (
+        f"{{{SVG_NAMESPACE}}}rect",
+        f"{{{SVG_NAMESPACE}}}image",
+    )
+)
+"""The tags of elements which may define a magic rectangle."""
+
+
 class MagicText(NamedTuple):
     """
     Represents the result of a piece of magic text found within a document.
     """
 
     parameters: Any
-    """The parsed parameters passed for this magic."""
+    """
+    The parsed parameters passed for this magic.
+
+    NB: Parsed values may be shared between identical magic texts and so must
+    be treated as read-only.
+    """
 
     parents: tuple[ET.Element, ...]
     """
@@ -118,34 +141,88 @@ class TooMuchMagicError(MagicError):
         return f"{super().__str__()}\nExactly one value must be defined (got {values})"
 
 
-def extract_magic(svg: ET.Element) -> dict[str, list[MagicText]]:
+_SIMPLE_TOML_KEY_STRING_VALUE = re.compile(
+    r"\A[ \t]*([A-Za-z0-9_-]+)[ \t]*=[ \t]*"
+    r'"([^"\\\x00-\x08\x0a-\x1f\x7f]*)"[ \t]*\n*\Z'
+)
+"""
+Matches the (very common) case of magic text consisting of a single bare key
+assigned a basic string without any escapes, e.g. ``id = "foo"``.
+"""
+
+
+@lru_cache(maxsize=1024)
+def _parse_toml(text: str) -> dict[str, Any]:
     """
-    Find, parse and remove from the SVG all magic text.
+    Parse a TOML document, memoising the result (magic text is frequently
+    repeated between slides). Raises tomllib.TOMLDecodeError on invalid
+    input.
+
+    The returned value is shared between callers and must not be mutated.
     """
-    out = defaultdict(list)
+    if match := _SIMPLE_TOML_KEY_STRING_VALUE.match(text):
+        return {match[1]: match[2]}
+    else:
+        return tomllib.loads(text)
 
-    # NB: Capture in list to allow safe mutation as we iterate
-    for elems, text in list(find_text_with_prefix(svg, "@@@\n")):
-        # Remove the <text> element from the document
-        elems[-2].remove(elems[-1])
-        parents = elems[:-1]
 
-        try:
-            parsed = tomllib.loads(text)
-        except tomllib.TOMLDecodeError as e:
-            raise MagicTOMLDecodeError(parents, text, e) from None
+def _parse_magic_text(
+    parents: tuple[ET.Element, ...], text: str
+) -> tuple[str, MagicText]:
+    """
+    Parse the text of a single magic <text> element (with the '@@@' prefix
+    already removed), returning the magic name and its :py:class:`MagicText`.
+
+    Raises a :py:exc:`MagicError` if the text is not valid magic.
+    """
+    try:
+        parsed = _parse_toml(text)
+    except tomllib.TOMLDecodeError as e:
+        raise MagicTOMLDecodeError(parents, text, e) from None
 
-        if len(parsed) == 0:
-            raise NotEnoughMagicError(parents, text)
-        elif len(parsed) > 1:
-            raise TooMuchMagicError(parents, text, list(parsed))
+    if len(parsed) == 0:
+        raise NotEnoughMagicError(parents, text)
+    elif len(parsed) > 1:
+        raise TooMuchMagicError(parents, text, list(parsed))
 
-        (name,) = parsed.keys()
-        parameters = parsed[name]
+    ((name, parameters),) = parsed.items()
 
-        out[name].append(MagicText(parameters, parents, text))
+    return name, MagicText(parameters, parents, text)
 
-    return out
+
+def extract_magic(
+    svg: ET.Element,
+    found: Iterable[tuple[tuple[ET.Element, ...], str]] | None = None,
+) -> dict[str, list[MagicText]]:
+    """
+    Find, parse and remove from the SVG all magic text.
+
+    If the magic <text> elements have already been located (e.g. using
+    :py:func:`slidie.svg_utils.find_text_with_prefixes` with
+    :py:data:`MAGIC_PREFIX`), these may be passed as 'found' to avoid
+    searching the document again.
+    """
+    if found is None:
+        found = find_text_with_prefix(svg, MAGIC_PREFIX)
+
+    parsed = []
+    to_remove = []
+    for elems, text in found:
+        parsed.append(_parse_magic_text(elems[:-1], text))
+        to_remove.append((elems[-2], elems[-1]))
+
+    # Remove the <text> elements from the document (NB: deferred until the
+    # search completes since the tree must not be mutated during traversal)
+    for parent, elem in to_remove:
+        parent.remove(elem)
+
+    # Group by name (NB: the sort is stable so document order is retained
+    # within each group)
+    parsed.sort(key=itemgetter(0))
+    return {
+        name: [magic_text for _name, magic_text in group]
+        for name, group in groupby(parsed, key=itemgetter(0))
+    }
 
 
 @dataclass
@@ -163,8 +240,7 @@ class SingleRectOrImageExpectedError(MagicError):
             got = "no elements present"
         else:
             tags = " and ".join(
-                "<" + elem.tag.removeprefix(f"{{{SVG_NAMESPACE}}}") + ">"
-                for elem in container
+                "<" + elem.tag.removeprefix(_SVG_TAG_PREFIX) + ">" for elem in container
             )
             got = f"got {tags}"
 
@@ -201,10 +277,7 @@ def get_magic_rectangle(magic_text: MagicText) -> MagicRectangle:
     if len(container) != 1:
         raise SingleRectOrImageExpectedError(magic_text.parents, magic_text.text)
     rectangle = container[0]
-    if rectangle.tag not in (
-        f"{{{SVG_NAMESPACE}}}rect",
-        f"{{{SVG_NAMESPACE}}}image",
-    ):
+    if rectangle.tag not in _MAGIC_RECTANGLE_TAGS:
         raise SingleRectOrImageExpectedError(magic_text.parents, magic_text.text)
 
     return MagicRectangle(container, rectangle)
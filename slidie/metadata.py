@@ -9,11 +9,21 @@ from xml.etree import ElementTree as ET
 from slidie.xml_namespaces import SLIDIE_NAMESPACE, SVG_NAMESPACE
 from slidie.svg_utils import (
     extract_multiline_text,
+    build_parent_map,
     get_elem_inksape_layers,
 )
 from slidie.magic import MagicText, MagicError
 
 
+METADATA_FIELDS = ("title", "author", "date")
+"""The names of the metadata fields handled by :py:func:`annotate_metadata`."""
+
+_SVG_TEXT_TAG = f"{{{SVG_NAMESPACE}}}text"
+
+_SLIDIE_ATTRS = {field: f"{{{SLIDIE_NAMESPACE}}}{field}" for field in METADATA_FIELDS}
+"""The (namespaced) <svg> attribute names for each metadata field."""
+
+
 @dataclass
 class MetadataError(Exception):
     """Base class for errors involving slide metadata."""
@@ -46,8 +56,9 @@ class MultipleMetadataDefinitionsError(MetadataError):
             )
 
         # Describe locations of <text> elements
+        parent_map = build_parent_map(self.svg) if self.text_elems else None
         for text_elem in self.text_elems:
-            layer = " > ".join(get_elem_inksape_layers(self.svg, text_elem))
+            layer = " > ".join(get_elem_inksape_layers(self.svg, text_elem, parent_map))
             text = extract_multiline_text(text_elem)
             source_descriptions.append(f"on {layer} in <text> {text!r}")
 
@@ -71,20 +82,27 @@ def annotate_metadata(svg: ET.Element, magic: dict[str, list[MagicText]]) -> Non
     If a metadata value is specified in more than one place, an exception is
     thrown.
     """
-    for field in ["title", "author", "date"]:
+    # Find identified <text> elements for all fields in a single pass over the
+    # document (NB: there should be one per field, of course, but that is no
+    # guarantee)
+    text_elems_by_field: dict[str, list[ET.Element]] = {}
+    for text_elem in svg.iter(_SVG_TEXT_TAG):
+        if (text_id := text_elem.get("id")) in _SLIDIE_ATTRS:
+            text_elems_by_field.setdefault(text_id, []).append(text_elem)
+
+    for field in METADATA_FIELDS:
         # Get magic values
         magic_values = magic.pop(field, [])
         values = [v.parameters for v in magic_values]
 
-        # Get identified <text> element (NB: there should be one, of course,
-        # but that is no guarantee
-        text_elems = svg.findall(f".//{{{SVG_NAMESPACE}}}text[@id='{field}']")
+        # Get identified <text> elements
+        text_elems = text_elems_by_field.get(field, [])
         if text_elems:
             values.extend(map(extract_multiline_text, text_elems))
 
         if len(values) == 0:
             continue
         if len(values) == 1:
-            svg.attrib[f"{{{SLIDIE_NAMESPACE}}}{field}"] = values[0]
+            svg.attrib[_SLIDIE_ATTRS[field]] = values[0]
         else:
             raise MultipleMetadataDefinitionsError(field, svg, magic_values, text_elems)
@@ -0,0 +1,46 @@
+"""
+Utilities for running independent pieces of work (e.g. rendering separate
+slides) concurrently.
+
+NB: Threads (rather than processes) are used since slidie's work is dominated
+by waiting on external processes (e.g. Inkscape). Threads also avoid the need
+to pickle (e.g. ElementTree) arguments and results.
+"""
+
+from typing import Any, Callable, Iterable, TypeVar
+
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+
+T = TypeVar("T")
+
+
+def parallel_map(
+    fn: Callable[..., T], *iterables: Iterable[Any], jobs: int | None = None
+) -> list[T]:
+    """
+    Equivalent to ``list(map(fn, *iterables))`` except that up to 'jobs' calls
+    (defaulting to the number of CPUs) may run concurrently in separate
+    threads. Results are returned in the same order as the inputs.
+
+    When only a single job is required, calls are made directly on the calling
+    thread.
+
+    If a call raises an exception, any calls not yet started are cancelled and
+    the exception is re-raised.
+    """
+    arguments = list(zip(*iterables))
+    jobs = min(jobs or os.cpu_count() or 1, len(arguments))
+
+    if jobs <= 1:
+        return [fn(*args) for args in arguments]
+
+    with ThreadPoolExecutor(jobs) as executor:
+        futures = [executor.submit(fn, *args) for args in arguments]
+        try:
+            return [future.result() for future in futures]
+        except BaseException:
+            # Don't bother running the remaining calls
+            executor.shutdown(cancel_futures=True)
+            raise
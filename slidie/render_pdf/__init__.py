@@ -2,22 +2,33 @@ from pathlib import Path
 
 from typing import NamedTuple
 
+import pickle
 from xml.etree import ElementTree as ET
 from tempfile import TemporaryDirectory
+from functools import partial, cache
+from contextlib import ExitStack, nullcontext
 
 from pikepdf import Pdf
 
 from slidie.xml_namespaces import SLIDIE_NAMESPACE
-from slidie.inkscape import Inkscape, open_etree_in_inkscape, set_visible_step
+from slidie.parallel import parallel_map
+from slidie.slide_cache import get_cache_key, find_linked_files, write_cache_entry
+from slidie.inkscape import (
+    Inkscape,
+    InkscapePool,
+    open_etree_in_inkscape,
+    set_visible_step,
+)
 from slidie.svg_utils import (
     annotate_build_steps,
     fill_inkscape_page_background,
     find_build_elements,
     get_build_step_range,
     get_build_tags,
+    find_text_with_prefixes,
 )
-from slidie.speaker_notes import extract_speaker_notes
-from slidie.magic import extract_magic
+from slidie.speaker_notes import extract_speaker_notes, SPEAKER_NOTES_PREFIX
+from slidie.magic import extract_magic, MAGIC_PREFIX
 from slidie.links import annotate_slide_id_from_magic, resolve_link
 from slidie.metadata import annotate_metadata
 
@@ -25,11 +36,26 @@ from slidie.render_pdf.pdf import (
     rewrite_internal_links,
     deduplicate_xobjects,
     SlidePageInfo,
-    setup_outline,
-    setup_page_numbering,
+    setup_outline_and_page_numbering,
 )
 
 
+# The <svg> attributes in which slide ID and metadata are annotated (by
+# slidie.links.annotate_slide_id_from_magic and
+# slidie.metadata.annotate_metadata).
+_K_ID = f"{{{SLIDIE_NAMESPACE}}}id"
+_K_TITLE = f"{{{SLIDIE_NAMESPACE}}}title"
+_K_AUTHOR = f"{{{SLIDIE_NAMESPACE}}}author"
+_K_DATE = f"{{{SLIDIE_NAMESPACE}}}date"
+
+
+_CONCATENATE_BATCH_SIZE = 64
+"""
+The maximum number of step PDFs held open at once while concatenating them
+into the output PDF.
+"""
+
+
 class RenderedSlideStep(NamedTuple):
     """
     The result of rendering a single slide step.
@@ -78,24 +104,26 @@ def render_slide(svg: ET.Element, inkscape: Inkscape, tmp_dir: Path) -> Rendered
     """
     annotate_build_steps(svg)
     build_elements = find_build_elements(svg)
-    build_tags = get_build_tags(svg)
+    build_tags = get_build_tags(svg, build_elements)
 
-    notes = extract_speaker_notes(svg)
+    found = find_text_with_prefixes(svg, (SPEAKER_NOTES_PREFIX, MAGIC_PREFIX))
+    notes = extract_speaker_notes(svg, found[SPEAKER_NOTES_PREFIX])
 
-    magic = extract_magic(svg)
+    magic = extract_magic(svg, found[MAGIC_PREFIX])
     annotate_slide_id_from_magic(magic)
     annotate_metadata(svg, magic)
 
-    slide_id = svg.get(f"{{{SLIDIE_NAMESPACE}}}id", None)
-    slide_title = svg.get(f"{{{SLIDIE_NAMESPACE}}}title", None)
-    slide_author = svg.get(f"{{{SLIDIE_NAMESPACE}}}author", None)
-    slide_date = svg.get(f"{{{SLIDIE_NAMESPACE}}}date", None)
+    attrib = svg.attrib
+    slide_id = attrib.get(_K_ID)
+    slide_title = attrib.get(_K_TITLE)
+    slide_author = attrib.get(_K_AUTHOR)
+    slide_date = attrib.get(_K_DATE)
 
     fill_inkscape_page_background(svg)
 
     steps = []
-    with open_etree_in_inkscape(inkscape, svg):
-        for step_number in get_build_step_range(svg):
+    with open_etree_in_inkscape(inkscape, svg, tmp_dir):
+        for step_number in get_build_step_range(svg, build_elements):
             set_visible_step(inkscape, build_elements, step_number)
             pdf_file = tmp_dir / f"{step_number}.pdf"
             inkscape.export(pdf_file)
@@ -124,6 +152,95 @@ def render_slide(svg: ET.Element, inkscape: Inkscape, tmp_dir: Path) -> Rendered
     )
 
 
+CACHE_FORMAT_ID = "pdf-1"
+"""
+The slide cache format identifier (see
+:py:func:`slidie.slide_cache.get_cache_key`). Must be changed whenever a
+change to the rendering process (or :py:class:`RenderedSlide`) would make
+existing cache entries invalid.
+"""
+
+
+def load_cached_slide(cache_entry: Path) -> RenderedSlide | None:
+    """
+    Load a previously rendered slide from a slide cache entry directory (as
+    written by :py:func:`store_cached_slide`). Returns None if not cached.
+
+    The step PDF files in the returned slide refer to files within the cache
+    and must not be modified.
+    """
+    try:
+        with (cache_entry / "slide.pickle").open("rb") as f:
+            slide: RenderedSlide = pickle.load(f)
+    except FileNotFoundError:
+        return None
+
+    return slide._replace(
+        steps=[
+            step._replace(pdf_file=cache_entry / step.pdf_file) for step in slide.steps
+        ]
+    )
+
+
+def store_cached_slide(cache_entry: Path, slide: RenderedSlide) -> None:
+    """
+    Store a rendered slide (including copies of its step PDFs) into a slide
+    cache entry directory. Does nothing if the entry already exists.
+    """
+    steps = [step._replace(pdf_file=Path(step.pdf_file.name)) for step in slide.steps]
+    files: dict[str, bytes | Path] = {
+        step.pdf_file.name: step.pdf_file for step in slide.steps
+    }
+    files["slide.pickle"] = pickle.dumps(slide._replace(steps=steps))
+    write_cache_entry(cache_entry, files)
+
+
+def render_slide_file(
+    inkscape_pool: InkscapePool,
+    svg_filename: Path,
+    tmp_dir: Path,
+    cache_dir: Path | None = None,
+) -> RenderedSlide:
+    """
+    Load and render a single slide file using an Inkscape instance from the
+    provided pool. See :py:func:`render_slide`.
+
+    The tmp_dir directory is created by this function and must not already
+    exist.
+
+    If a cache_dir is given, the rendered slide is looked up in (or, if
+    absent, added to) the slide cache in that directory, keyed on the
+    contents of the SVG file and any files it links to (along with the
+    Inkscape version).
+    """
+    try:
+        svg_bytes = svg_filename.read_bytes()
+        svg = ET.fromstring(svg_bytes)
+
+        cache_entry = None
+        if cache_dir is not None:
+            cache_entry = cache_dir / get_cache_key(
+                svg_bytes,
+                CACHE_FORMAT_ID,
+                inkscape_pool.version,
+                find_linked_files(svg, svg_filename.parent),
+            )
+            if (slide := load_cached_slide(cache_entry)) is not None:
+                return slide
+
+        tmp_dir.mkdir()
+        with inkscape_pool.get() as inkscape:
+            slide = render_slide(svg, inkscape, tmp_dir)
+
+        if cache_entry is not None:
+            store_cached_slide(cache_entry, slide)
+
+        return slide
+    except Exception as exc:
+        exc.add_note(f"While processing {svg_filename}")
+        raise
+
+
 def resolve_internal_links(pdf: Pdf, slides: list[RenderedSlide]) -> None:
     """
     Resolve all internal links (e.g. like #123) into PDF inter-page links.
@@ -138,59 +255,94 @@ def resolve_internal_links(pdf: Pdf, slides: list[RenderedSlide]) -> None:
         [step.step_number for step in slide.steps] for slide in slides
     ]
     slide_build_tags = [slide.build_tags for slide in slides]
-    slide_step_to_page = [
+    page_to_slide_step = [
         (slide_index, step_index)
         for slide_index, slide in enumerate(slides)
         for step_index in range(len(slide.steps))
     ]
+    slide_step_to_page = {
+        slide_step: page for page, slide_step in enumerate(page_to_slide_step)
+    }
+    page_to_slide = [slide_index for slide_index, _step in page_to_slide_step]
 
-    def resolve(page: int, url: str) -> int | None:
+    # NB: Links are frequently repeated (e.g. navigation links on every step
+    # of a slide) so resolutions are memoised
+    @cache
+    def resolve_from_slide(slide_index: int, url: str) -> int | None:
         target = resolve_link(
-            str(url),
+            url,
             slide_ids,
             slide_step_numbers,
             slide_build_tags,
-            slide_step_to_page[page][0],
+            slide_index,
         )
         if target is None:
             return None  # Link is not a valid internal link
-        try:
-            return slide_step_to_page.index(target)
-        except ValueError:
-            # The slide/step referenced did not exist.
-            return None
+
+        # NB: None if the slide/step referenced did not exist.
+        return slide_step_to_page.get(target)
+
+    def resolve(page: int, url: str) -> int | None:
+        return resolve_from_slide(page_to_slide[page], str(url))
 
     rewrite_internal_links(pdf, resolve)
 
 
-def render_pdf(slide_filenames: list[Path], output: Path) -> None:
+def render_pdf(
+    slide_filenames: list[Path],
+    output: Path,
+    jobs: int | None = None,
+    inkscape_pool: InkscapePool | None = None,
+    cache_dir: Path | None = None,
+) -> None:
     """
     Render a slidie show into a PDF.
+
+    Up to 'jobs' slides are rendered concurrently, each using its own Inkscape
+    instance. Defaults to the number of CPUs.
+
+    By default, Inkscape instances are started for (and shut down after)
+    each call. When rendering several shows, an :py:class:`InkscapePool` may
+    be passed in to reuse already running instances between calls.
+
+    If a cache_dir is given, rendered slides are cached in that directory
+    and reused when rendering identical slide files in the future.
     """
     with Pdf.new() as out_pdf:
         with TemporaryDirectory() as tmp_dir_str:
             tmp_dir = Path(tmp_dir_str)
 
             # Render slides to PDF
-            slides = []
-            with Inkscape() as inkscape:
-                for slide_index, svg_filename in enumerate(slide_filenames):
-                    try:
-                        svg = ET.parse(svg_filename).getroot()
-                        slide_tmp_dir = tmp_dir / str(slide_index)
-                        slide_tmp_dir.mkdir()
-                        slides.append(render_slide(svg, inkscape, slide_tmp_dir))
-                    except Exception as exc:
-                        exc.add_note(f"While processing {svg_filename}")
-                        raise
-
-            # Concatenate into single PDF
+            with (
+                nullcontext(inkscape_pool)
+                if inkscape_pool is not None
+                else InkscapePool()
+            ) as inkscape_pool:
+                slides = parallel_map(
+                    partial(render_slide_file, inkscape_pool, cache_dir=cache_dir),
+                    slide_filenames,
+                    [tmp_dir / str(i) for i in range(len(slide_filenames))],
+                    jobs=jobs,
+                )
+
+            # Concatenate into single PDF. (NB: The step PDFs are our own
+            # freshly generated files so there is no need for qpdf to attempt
+            # recovery of damaged files.)
+            #
+            # NB: Step PDFs are opened in bounded batches since each open PDF
+            # holds a file descriptor.
+            step_files = [step.pdf_file for slide in slides for step in slide.steps]
             version = out_pdf.pdf_version
-            for slide in slides:
-                for step in slide.steps:
-                    with Pdf.open(step.pdf_file) as step_pdf:
-                        version = max(version, step_pdf.pdf_version)
-                        out_pdf.pages.append(step_pdf.pages[0])
+            for start in range(0, len(step_files), _CONCATENATE_BATCH_SIZE):
+                with ExitStack() as stack:
+                    step_pdfs = [
+                        stack.enter_context(Pdf.open(step_file, attempt_recovery=False))
+                        for step_file in step_files[
+                            start : start + _CONCATENATE_BATCH_SIZE
+                        ]
+                    ]
+                    version = max([version] + [p.pdf_version for p in step_pdfs])
+                    out_pdf.pages.extend(step_pdf.pages[0] for step_pdf in step_pdfs)
 
         resolve_internal_links(out_pdf, slides)
 
@@ -204,8 +356,7 @@ def render_pdf(slide_filenames: list[Path], output: Path) -> None:
             for slide_index, slide in enumerate(slides)
             for step_index, step in enumerate(slide.steps)
         ]
-        setup_page_numbering(out_pdf, slide_infos)
-        setup_outline(out_pdf, slide_infos)
+        setup_outline_and_page_numbering(out_pdf, slide_infos)
 
         # Setup PDF-wide metadata
         with out_pdf.open_metadata() as meta:
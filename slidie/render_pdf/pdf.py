@@ -7,6 +7,8 @@ from typing import Callable, Any
 from dataclasses import dataclass
 from pathlib import Path
 from collections import defaultdict
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import nullcontext
 
 import hashlib
 
@@ -30,25 +32,41 @@ def rewrite_internal_links(
         should return the page number. Otherwise it should return None and the
         link will be left unchanged.
     """
+    # NB: Each Name.* attribute access constructs a new Name object so these
+    # are looked up once, outside the loop
+    name_link = Name.Link
+    name_uri = Name.URI
+
+    # Destination page objects (looked up once up-front since many links may
+    # point at the same page)
+    page_objs = [page.obj for page in pdf.pages]
+
     for page_number, page in enumerate(pdf.pages):
-        # XXX: Pikepdf's .get() method doesn't correctly type its default
-        # argument
-        for annotation in page.get("/Annots", []):  # type: ignore
+        annotations = page.get(Name.Annots)
+        if not annotations:
+            # Most pages contain no annotations at all
+            continue
+
+        for annotation in annotations:
             if (
                 annotation
                 and
                 # Link annotations...
-                annotation.Subtype == Name.Link
+                annotation.Subtype == name_link
                 and
                 # ...with a URI action
                 "/A" in annotation
-                and annotation.A.S == Name.URI
+                and annotation.A.S == name_uri
             ):
                 destination_page = resolver(page_number, annotation.A.URI)
                 if destination_page is not None:
                     # Replace URI action with a page Destination
                     del annotation.A
-                    annotation.Dest = [pdf.pages[destination_page].obj, Name.Fit]
+                    annotation.Dest = [page_objs[destination_page], Name.Fit]
+
+
+def _sha256(data: memoryview) -> bytes:
+    return hashlib.sha256(data).digest()
 
 
 def deduplicate_xobjects(pdf: Pdf) -> None:
@@ -59,37 +77,81 @@ def deduplicate_xobjects(pdf: Pdf) -> None:
     """
     # A bucket-style-hashtable like lookup with shape::
     #
-    #     {prefix: [xobject_ref, ...], ...}
+    #     {digest: [xobject_ref, ...], ...}
     #
-    # The 'prefix' key is the first 1kb of the stream data mapping to a
-    # list of indirect XObject references whose
-
+    # The 'digest' key is the SHA-256 digest of the (raw) stream data mapping
+    # to a list of indirect XObject references whose data has that digest.
+    #
+    # NB: Objects sharing a digest are still compared for equality (which also
+    # compares the stream dictionaries) before being substituted. In practice
+    # this comparison is only made against true duplicates.
     seen_xobjects: dict[bytes, list[Object]] = defaultdict(list)
 
-    for page in pdf.pages:
-        # XXX: Pikepdf's .get() method doesn't correctly type its default
-        # argument
-        page_xobjects = page.get(Name.Resources, {}).get(Name.XObject, {})  # type: ignore
-        assert page_xobjects is not None
-        for name, xobject in list(page_xobjects.items()):
-            if not (isinstance(xobject, Stream) and xobject.is_indirect):
-                # Should never occur because:
-                #   a) XObjects are always streams
-                #   b) Streams are always indirect objects
-                # ... at least in PDF 1.5 anyway. But this keeps us safe from
-                # future PDF standards changing things.
-                continue
-
-            prefix = xobject.read_raw_bytes()[:1024]
+    # As a cheap pre-filter, XObjects are only hashed once another XObject
+    # with the same (length, first byte) has been seen. This lookup has shape::
+    #
+    #     {(length, first_byte): (page_xobjects, name, xobject_ref) or None, ...}
+    #
+    # Where the value is the first XObject seen with that length and first
+    # byte (and where it is referenced from), or None once that XObject has
+    # been queued for hashing.
+    unhashed_xobjects: dict[tuple[int, int], tuple[Any, str, Object] | None] = {}
+
+    # The XObjects to be hashed (in the order they were encountered) along
+    # with where they're referenced from and their (future) digest.
+    #
+    # NB: Hashing is performed in a thread pool (hashlib releases the GIL for
+    # large inputs) while the main thread continues reading the PDF. All access
+    # to the PDF itself remains on the main thread since QPDF is not
+    # thread-safe.
+    to_deduplicate: list[tuple[Any, str, Object, Future[bytes]]] = []
+
+    with ThreadPoolExecutor() as executor:
+        for page in pdf.pages:
+            # XXX: Pikepdf's .get() method doesn't correctly type its default
+            # argument
+            page_xobjects = page.get(Name.Resources, {}).get(Name.XObject, {})  # type: ignore
+            assert page_xobjects is not None
+            for name, xobject in page_xobjects.items():
+                if not (isinstance(xobject, Stream) and xobject.is_indirect):
+                    # Should never occur because:
+                    #   a) XObjects are always streams
+                    #   b) Streams are always indirect objects
+                    # ... at least in PDF 1.5 anyway. But this keeps us safe
+                    # from future PDF standards changing things.
+                    continue
+
+                # NB: Hash the raw stream buffer directly rather than first
+                # copying it into a bytes object (as read_raw_bytes() would)
+                raw_data = memoryview(xobject.get_raw_stream_buffer())
+
+                prefilter_key = (len(raw_data), raw_data[0] if raw_data else -1)
+                if prefilter_key not in unhashed_xobjects:
+                    # Definitely unique (so far): no need to hash it (yet)
+                    unhashed_xobjects[prefilter_key] = (page_xobjects, name, xobject)
+                    continue
+                elif (first := unhashed_xobjects[prefilter_key]) is not None:
+                    first_raw_data = memoryview(first[2].get_raw_stream_buffer())
+                    to_deduplicate.append(
+                        (*first, executor.submit(_sha256, first_raw_data))
+                    )
+                    unhashed_xobjects[prefilter_key] = None
+
+                to_deduplicate.append(
+                    (page_xobjects, name, xobject, executor.submit(_sha256, raw_data))
+                )
+
+        for page_xobjects, name, xobject, digest_future in to_deduplicate:
+            digest = digest_future.result()
 
             # Substitute for previously seen object if possible
-            for other_xobject in seen_xobjects.get(prefix, []):
+            for other_xobject in seen_xobjects.get(digest, []):
                 if other_xobject == xobject:
                     page_xobjects[name] = other_xobject
                     break
             else:
                 # This is a previously unseen object
-                seen_xobjects[prefix].append(xobject)
+                seen_xobjects[digest].append(xobject)
 
 
 @dataclass
@@ -112,50 +174,19 @@ class SlidePageInfo:
     """The title assigned to this step (if any)."""
 
 
-def setup_outline(pdf, slide_infos: list[SlidePageInfo]) -> None:
-    """
-    Create an outline (a.k.a. bookmarks/ToC) in the PDF based on the provided
-    per-step (i.e. per-page) information.
+def setup_outline_and_page_numbering(
+    pdf,
+    slide_infos: list[SlidePageInfo],
+    outline: bool = True,
+    page_numbering: bool = True,
+) -> None:
     """
-    with pdf.open_outline() as outline:
-        cur_slide_index = None
-        cur_outline_parent = None
-        for page_index, slide_info in enumerate(slide_infos):
-            # Top-level entry for the first step of a slide
-            if cur_slide_index != slide_info.slide_index:
-                cur_outline_parent = outline.root
-                cur_outline_parent.append(
-                    OutlineItem(
-                        (
-                            f"Slide {slide_info.slide_index + 1}"
-                            if slide_info.title is None
-                            else slide_info.title
-                        ),
-                        page_index,
-                    )
-                )
-                cur_outline_parent = cur_outline_parent[-1].children
-                cur_slide_index = slide_info.slide_index
-            else:
-                # Subsequent steps within the current slide
-                assert cur_outline_parent is not None
-                cur_outline_parent.append(
-                    OutlineItem(
-                        (
-                            f"Step {slide_info.step_index + 1}"
-                            if slide_info.title is None
-                            else slide_info.title
-                        ),
-                        page_index,
-                    )
-                )
-
+    Create an outline (a.k.a. bookmarks/ToC) and/or custom page numbering in
+    the PDF based on the provided per-step (i.e. per-page) information in a
+    single pass.
 
-def setup_page_numbering(pdf, slide_infos: list[SlidePageInfo]) -> None:
-    """
-    Sets up custom page numbering of the form ``123`` for the first step of
-    each slide and ``123#456`` for subsequent steps in that slide -- just like
-    the generic URL-hash scheme used for URLs.
+    See :py:func:`setup_outline` and :py:func:`setup_page_numbering` for
+    details of the outline and numbering produced.
     """
     # A /PageLabels./Nums structure (see 'Page labels' in PDF spec)
     #
@@ -172,33 +203,82 @@ def setup_page_numbering(pdf, slide_infos: list[SlidePageInfo]) -> None:
     #    }
     numbering_scheme: list[int | dict[Any, Any]] = []
 
-    with pdf.open_outline() as outline:
+    with pdf.open_outline() if outline else nullcontext() as pdf_outline:
         cur_slide_index = None
-        cur_outline_parent = None
+        cur_outline_parent: list[OutlineItem] | None = None
         for page_index, slide_info in enumerate(slide_infos):
             if cur_slide_index != slide_info.slide_index:
                 # The first step of a slide
-                numbering_scheme.append(page_index)
-                numbering_scheme.append(
-                    {
-                        "/Type": Name.PageLabel,
-                        "/S": Name.D,  # Arabic decimals
-                        "/St": slide_info.slide_index + 1,
-                    }
-                )
                 cur_slide_index = slide_info.slide_index
-            elif slide_info.step_index == 1:
-                # The first of subsequent steps within the current slide
-                numbering_scheme.append(page_index)
-                numbering_scheme.append(
-                    {
-                        "/Type": Name.PageLabel,
-                        "/S": Name.D,  # Arabic decimals
-                        "/St": 2,
-                        "/P": f"{slide_info.slide_index + 1}#",
-                    }
-                )
+                if outline:
+                    # Top-level entry
+                    outline_item = OutlineItem(
+                        (
+                            f"Slide {slide_info.slide_index + 1}"
+                            if slide_info.title is None
+                            else slide_info.title
+                        ),
+                        page_index,
+                    )
+                    assert pdf_outline is not None
+                    pdf_outline.root.append(outline_item)
+                    cur_outline_parent = outline_item.children
+                if page_numbering:
+                    numbering_scheme.extend(
+                        (
+                            page_index,
+                            {
+                                "/Type": Name.PageLabel,
+                                "/S": Name.D,  # Arabic decimals
+                                "/St": slide_info.slide_index + 1,
+                            },
+                        )
+                    )
             else:
-                pass  # All subsequent steps will be numbered automatically
+                # Subsequent steps within the current slide
+                if outline:
+                    assert cur_outline_parent is not None
+                    cur_outline_parent.append(
+                        OutlineItem(
+                            (
+                                f"Step {slide_info.step_index + 1}"
+                                if slide_info.title is None
+                                else slide_info.title
+                            ),
+                            page_index,
+                        )
+                    )
+                if page_numbering and slide_info.step_index == 1:
+                    # The first of subsequent steps within the current slide
+                    # (all later steps will be numbered automatically)
+                    numbering_scheme.extend(
+                        (
+                            page_index,
+                            {
+                                "/Type": Name.PageLabel,
+                                "/S": Name.D,  # Arabic decimals
+                                "/St": 2,
+                                "/P": f"{slide_info.slide_index + 1}#",
+                            },
+                        )
+                    )
+
+    if page_numbering:
+        pdf.Root.PageLabels = {"/Nums": numbering_scheme}
+
+
+def setup_outline(pdf, slide_infos: list[SlidePageInfo]) -> None:
+    """
+    Create an outline (a.k.a. bookmarks/ToC) in the PDF based on the provided
+    per-step (i.e. per-page) information.
+    """
+    setup_outline_and_page_numbering(pdf, slide_infos, page_numbering=False)
 
-    pdf.Root.PageLabels = {"/Nums": numbering_scheme}
+
+def setup_page_numbering(pdf, slide_infos: list[SlidePageInfo]) -> None:
+    """
+    Sets up custom page numbering of the form ``123`` for the first step of
+    each slide and ``123#456`` for subsequent steps in that slide -- just like
+    the generic URL-hash scheme used for URLs.
+    """
+    setup_outline_and_page_numbering(pdf, slide_infos, outline=False)
@@ -10,14 +10,20 @@ from xml.etree import ElementTree as ET
 from string import Formatter
 from itertools import count
 
-from slidie.inkscape import Inkscape, open_etree_in_inkscape, set_visible_step
+from slidie.inkscape import (
+    Inkscape,
+    make_tmp_workspace,
+    open_etree_in_inkscape,
+    set_visible_step,
+)
 from slidie.svg_utils import (
     annotate_build_steps,
     find_build_elements,
     get_build_step_range,
+    find_text_with_prefixes,
 )
-from slidie.speaker_notes import extract_speaker_notes
-from slidie.magic import extract_magic
+from slidie.speaker_notes import extract_speaker_notes, SPEAKER_NOTES_PREFIX
+from slidie.magic import extract_magic, MAGIC_PREFIX
 
 
 def iter_output_filenames(template: Path) -> Iterator[Path]:
@@ -46,22 +52,29 @@ def render_slide(
     filenames: Iterator[Path],
     dpi: float = 96.0,
     background_opacity: float | None = 1.0,
+    workspace: Path | None = None,
 ) -> Iterator[Path]:
     """
     Render a single slide into a series of PNGs, one per step. Writes the
     slides to the filenames generated by the 'filenames' iterator argument.
 
+    The optional workspace argument gives a temporary directory to use while
+    rendering (see :py:func:`slidie.inkscape.open_etree_in_inkscape`).
+
     Generates the list of PNG files written.
     """
     annotate_build_steps(svg)
     build_elements = find_build_elements(svg)
 
     # Neither speaker notes nor magic are processed for PNG output
-    extract_speaker_notes(svg)
-    extract_magic(svg)
-
-    with open_etree_in_inkscape(inkscape, svg):
-        for step_number, filename in zip(get_build_step_range(svg), filenames):
+    found = find_text_with_prefixes(svg, (SPEAKER_NOTES_PREFIX, MAGIC_PREFIX))
+    extract_speaker_notes(svg, found[SPEAKER_NOTES_PREFIX])
+    extract_magic(svg, found[MAGIC_PREFIX])
+
+    with open_etree_in_inkscape(inkscape, svg, workspace):
+        for step_number, filename in zip(
+            get_build_step_range(svg, build_elements), filenames
+        ):
             set_visible_step(inkscape, build_elements, step_number)
             inkscape.export(filename, dpi=dpi, background_opacity=background_opacity)
             yield filename
@@ -80,13 +93,18 @@ def render_png(
     filename_generator = iter_output_filenames(output)
 
     output_filenames: list[Path] = []
-    with Inkscape() as inkscape:
+    with Inkscape() as inkscape, make_tmp_workspace() as workspace:
         for slide_index, svg_filename in enumerate(slide_filenames):
             svg = ET.parse(svg_filename).getroot()
             try:
                 output_filenames.extend(
                     render_slide(
-                        svg, inkscape, filename_generator, dpi, background_opacity
+                        svg,
+                        inkscape,
+                        filename_generator,
+                        dpi,
+                        background_opacity,
+                        workspace,
                     )
                 )
             except Exception as exc:
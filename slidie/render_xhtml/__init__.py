@@ -10,18 +10,23 @@ just bog-standard HTML5, but lightly tweaked to become valid XML!
 from pathlib import Path
 
 from xml.etree import ElementTree as ET
+from contextlib import nullcontext
+from functools import partial
 
 from slidie.xml_namespaces import SLIDIE_NAMESPACE
-from slidie.inkscape import Inkscape
+from slidie.inkscape import Inkscape, InkscapePool
+from slidie.parallel import parallel_map
+from slidie.slide_cache import get_cache_key, find_linked_files, write_cache_entry
 from slidie.text_to_selectable_paths import text_to_selectable_paths
 from slidie.embed_thumbnails import embed_thumbnails
 from slidie.svg_utils import (
     annotate_build_steps,
     fill_inkscape_page_background,
     clip_to_inkscape_pages,
+    find_text_with_prefixes,
 )
-from slidie.speaker_notes import embed_speaker_notes
-from slidie.magic import MagicText, extract_magic
+from slidie.speaker_notes import embed_speaker_notes, SPEAKER_NOTES_PREFIX
+from slidie.magic import MagicText, extract_magic, MAGIC_PREFIX
 from slidie.links import annotate_slide_id_from_magic
 from slidie.metadata import annotate_metadata
 from slidie.render_xhtml.browser_magic import embed_videos, embed_iframes
@@ -30,6 +35,15 @@ from slidie.render_xhtml.template import render_template
 
 BASE_TEMPLATE_FILENAME = Path(__file__).parent / "base.xhtml"
 
+_K_SOURCE = f"{{{SLIDIE_NAMESPACE}}}source"
+
+CACHE_FORMAT_ID = "xhtml-2"
+"""
+The slide cache format identifier (see
+:py:func:`slidie.slide_cache.get_cache_key`). Must be changed whenever a
+change to :py:func:`render_slide` would make existing cache entries invalid.
+"""
+
 
 def render_slide(
     filename: Path,
@@ -42,7 +56,7 @@ def render_slide(
     this function. The returned value should be used in any case.
     """
     svg = ET.parse(filename).getroot()
-    svg.attrib[f"{{{SLIDIE_NAMESPACE}}}source"] = str(filename)
+    svg.attrib[_K_SOURCE] = str(filename)
 
     # The Javascript presentation runner will use these annotations to step
     # through builds
@@ -51,18 +65,21 @@ def render_slide(
     # so must be performed early on
     annotate_build_steps(svg)
 
+    # Locate speaker notes and magic text in a single pass
+    found = find_text_with_prefixes(svg, (SPEAKER_NOTES_PREFIX, MAGIC_PREFIX))
+
     # Extract speaker notes into a <slidie:notes> element
     #
     # NB: Must come before text_to_selectable_paths and embed_thumbnails since
     # this will remove the magic <text> elements and we don't want them
     # appearing later.
-    embed_speaker_notes(svg)
+    embed_speaker_notes(svg, found[SPEAKER_NOTES_PREFIX])
 
     # Extract magic text
     #
     # NB: Must also be done before text_to_selectable_paths and
     # embed_thumbnails
-    magic = extract_magic(svg)
+    magic = extract_magic(svg, found[MAGIC_PREFIX])
 
     annotate_slide_id_from_magic(magic)
     annotate_metadata(svg, magic)
@@ -94,22 +111,83 @@ def render_slide(
     return svg
 
 
+def render_slide_file(
+    inkscape_pool: InkscapePool, filename: Path, cache_dir: Path | None = None
+) -> ET.Element:
+    """
+    Render a single slide file using an Inkscape instance from the provided
+    pool. See :py:func:`render_slide`.
+
+    If a cache_dir is given, the rendered slide is looked up in (or, if
+    absent, added to) the slide cache in that directory, keyed on the
+    contents of the SVG file and any files it links to (along with the
+    Inkscape version).
+    """
+    try:
+        cache_entry = None
+        if cache_dir is not None:
+            svg_bytes = filename.read_bytes()
+            cache_entry = cache_dir / get_cache_key(
+                svg_bytes,
+                CACHE_FORMAT_ID,
+                inkscape_pool.version,
+                find_linked_files(ET.fromstring(svg_bytes), filename.parent),
+            )
+            try:
+                svg = ET.parse(cache_entry / "slide.svg").getroot()
+            except FileNotFoundError:
+                pass
+            else:
+                # NB: The filename isn't part of the cache key so the source
+                # annotation may be stale
+                svg.attrib[_K_SOURCE] = str(filename)
+                return svg
+
+        with inkscape_pool.get() as inkscape:
+            svg = render_slide(filename, inkscape)
+
+        if cache_entry is not None:
+            write_cache_entry(
+                cache_entry, {"slide.svg": ET.tostring(svg, encoding="utf-8")}
+            )
+
+        return svg
+    except Exception as exc:
+        exc.add_note(f"While processing {filename}")
+        raise
+
+
 def render_xhtml(
-    slide_filenames: list[Path], output: Path, debug: bool = False
+    slide_filenames: list[Path],
+    output: Path,
+    debug: bool = False,
+    jobs: int | None = None,
+    inkscape_pool: InkscapePool | None = None,
+    cache_dir: Path | None = None,
 ) -> None:
     """
     Render a slidie show into a self-contained XHTML file.
+
+    Up to 'jobs' slides are rendered concurrently, each using its own Inkscape
+    instance. Defaults to the number of CPUs. As in
+    :py:func:`slidie.render_pdf.render_pdf`, an :py:class:`InkscapePool` may
+    be passed in to reuse already running Inkscape instances.
+
+    If a cache_dir is given, rendered slides are cached in that directory
+    and reused when rendering identical slide files in the future.
     """
-    slides = []
-    with Inkscape() as inkscape:
-        for filename in slide_filenames:
-            try:
-                slides.append(render_slide(filename, inkscape))
-            except Exception as exc:
-                exc.add_note(f"While processing {filename}")
-                raise
+    with (
+        nullcontext(inkscape_pool) if inkscape_pool is not None else InkscapePool()
+    ) as inkscape_pool:
+        slides = parallel_map(
+            partial(render_slide_file, inkscape_pool, cache_dir=cache_dir),
+            slide_filenames,
+            jobs=jobs,
+        )
 
     xhtml_root = render_template(BASE_TEMPLATE_FILENAME, slides, debug)
 
-    with output.open("wb") as f:
+    # NB: A large buffer is used since the (potentially very large) document is
+    # serialised in many small writes
+    with output.open("wb", buffering=1 << 20) as f:
         ET.ElementTree(xhtml_root).write(f, encoding="utf-8")
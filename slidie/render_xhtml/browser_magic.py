@@ -7,7 +7,10 @@ from typing import NamedTuple, Any
 from xml.etree import ElementTree as ET
 
 import json
+import math
 import mimetypes
+import posixpath
+from functools import lru_cache
 from urllib.parse import urlparse, parse_qsl, urlencode
 
 from slidie.xml_namespaces import XHTML_NAMESPACE, SVG_NAMESPACE, SLIDIE_NAMESPACE
@@ -15,6 +18,38 @@ from slidie.magic import MagicText, MagicRectangle, get_magic_rectangle
 from slidie.video import find_video_magic
 
 
+_SVG_FOREIGN_OBJECT_TAG = f"{{{SVG_NAMESPACE}}}foreignObject"
+_XHTML_VIDEO_TAG = f"{{{XHTML_NAMESPACE}}}video"
+_XHTML_SOURCE_TAG = f"{{{XHTML_NAMESPACE}}}source"
+_XHTML_IFRAME_TAG = f"{{{XHTML_NAMESPACE}}}iframe"
+
+_K_SCALE = f"{{{SLIDIE_NAMESPACE}}}scale"
+_K_STEPS = f"{{{SLIDIE_NAMESPACE}}}steps"
+_K_START = f"{{{SLIDIE_NAMESPACE}}}start"
+_K_MAGIC = f"{{{SLIDIE_NAMESPACE}}}magic"
+
+_FOREIGN_OBJECT_COPIED_ATTRS = ("id", "x", "y", "width", "height", "transform")
+"""
+Attributes copied from a magic rectangle to its substitute <foreignObject>.
+"""
+
+
+def _to_json(value: float | tuple[int, ...] | None) -> str:
+    """
+    Equivalent to :py:func:`json.dumps` for the numbers, tuples of integers
+    and None values stored in attributes by this module, but without the
+    overhead of a call into the json module for these trivial cases.
+    """
+    if value is None:
+        return "null"
+    elif isinstance(value, tuple):
+        return f"[{', '.join(map(str, value))}]"
+    elif type(value) in (int, float) and math.isfinite(value):
+        return repr(value)
+    else:
+        return json.dumps(value)
+
+
 def substitute_foreign_object(
     magic_rectangle: MagicRectangle,
     scale: float | None = 1.0,
@@ -30,19 +65,37 @@ def substitute_foreign_object(
     """
     magic_rectangle.container.remove(magic_rectangle.rectangle)
 
-    foreign_object = ET.SubElement(
-        magic_rectangle.container, f"{{{SVG_NAMESPACE}}}foreignObject"
-    )
+    foreign_object = ET.SubElement(magic_rectangle.container, _SVG_FOREIGN_OBJECT_TAG)
     if scale is not None:
-        foreign_object.attrib[f"{{{SLIDIE_NAMESPACE}}}scale"] = json.dumps(scale)
+        foreign_object.attrib[_K_SCALE] = _to_json(scale)
 
-    for attrib in ["id", "x", "y", "width", "height", "transform"]:
+    for attrib in _FOREIGN_OBJECT_COPIED_ATTRS:
         if attrib in magic_rectangle.rectangle.attrib:
             foreign_object.attrib[attrib] = magic_rectangle.rectangle.attrib[attrib]
 
     return foreign_object
 
 
+@lru_cache(maxsize=64)
+def _guess_mimetype_from_extension(extension: str) -> str | None:
+    return mimetypes.guess_type(f"file{extension}")[0]
+
+
+def guess_video_mimetype(url: str) -> str | None:
+    """
+    Guess the mimetype of a video from its URL, or return None if unknown.
+
+    Lookups are memoised by filename extension since, in practice, the same
+    few extensions are used by every video in a show.
+    """
+    if url.startswith("data:"):
+        return mimetypes.guess_type(url)[0]
+    else:
+        # NB: Any query string or fragment (e.g. a '#t=10' media fragment) is
+        # ignored
+        return _guess_mimetype_from_extension(posixpath.splitext(urlparse(url).path)[1])
+
+
 def embed_videos(magic: dict[str, list[MagicText]]) -> None:
     """
     Given any magic video specifications, inserts <video> elements within a
@@ -52,21 +105,22 @@ def embed_videos(magic: dict[str, list[MagicText]]) -> None:
         foreign_object = substitute_foreign_object(video.magic_rectangle)
 
         # Setup <video> element
-        video_elem = ET.SubElement(foreign_object, f"{{{XHTML_NAMESPACE}}}video")
+        video_attrib = {}
         if video.loop:
-            video_elem.attrib["loop"] = "true"
+            video_attrib["loop"] = "true"
         if video.mute:
-            video_elem.attrib["muted"] = "true"
-        video_elem.attrib["preload"] = "auto"
-        video_elem.attrib["style"] = "display: block; width: 100%; height: 100%"
-        video_elem.attrib[f"{{{SLIDIE_NAMESPACE}}}steps"] = json.dumps(video.steps)
-        video_elem.attrib[f"{{{SLIDIE_NAMESPACE}}}start"] = str(video.start)
-        video_elem.attrib[f"{{{SLIDIE_NAMESPACE}}}magic"] = "ta-da!"
+            video_attrib["muted"] = "true"
+        video_attrib["preload"] = "auto"
+        video_attrib["style"] = "display: block; width: 100%; height: 100%"
+        video_attrib[_K_STEPS] = _to_json(video.steps)
+        video_attrib[_K_START] = str(video.start)
+        video_attrib[_K_MAGIC] = "ta-da!"
+        video_elem = ET.SubElement(foreign_object, _XHTML_VIDEO_TAG, video_attrib)
 
-        source_elem = ET.SubElement(video_elem, f"{{{XHTML_NAMESPACE}}}source")
-        source_elem.attrib["src"] = video.url
-        if mimetype := mimetypes.guess_type(video.url)[0]:
-            source_elem.attrib["type"] = mimetype
+        source_attrib = {"src": video.url}
+        if mimetype := guess_video_mimetype(video.url):
+            source_attrib["type"] = mimetype
+        ET.SubElement(video_elem, _XHTML_SOURCE_TAG, source_attrib)
 
 
 class IFrameMagicParameters(NamedTuple):
@@ -83,33 +137,36 @@ def normalise_iframe_magic_parameters(
     within it in normalised form.
     """
     if isinstance(parameters, str):
-        parameters = {"url": parameters}
+        # Just a URL: no further processing required
+        return IFrameMagicParameters(url=parameters, scale=1.0, name=None)
 
     url = parameters.get("url", "about:blank")
 
-    # Normalise query parameter into [{"name": ..., "value": ...}, ...]
-    query: list[dict[str, str]] | dict[str, str | list[str]] = parameters.get(
-        "query", []
-    )
-    if isinstance(query, dict):
-        query = [
-            {"name": name, "value": value}
-            for name, values in query.items()
-            for value in (values if isinstance(values, list) else [values])
-        ]
-
     # Add extra query strings to URL.
     #
     # NB: We only do this step if some extra query values are given since it
     # involves parsing and reconstituting the URL which may be a lossy process
     # if the URL is not valid. (Better to pass an invalid URL to the browser
     # (when possible) than to corrupt it silently here!)
+    query: list[dict[str, str]] | dict[str, str | list[str]] | None = parameters.get(
+        "query"
+    )
     if query:
+        # Normalise query parameter into [(name, value_or_values), ...]
+        #
+        # NB: List values are expanded into repeated parameters by urlencode
+        # (with doseq=True)
+        query_pairs: list[tuple[str, str | list[str]]]
+        if isinstance(query, dict):
+            query_pairs = list(query.items())
+        else:
+            query_pairs = [(nv["name"], nv["value"]) for nv in query]
+
         url_parts = urlparse(url)
         url_parts = url_parts._replace(
             query=urlencode(
-                parse_qsl(url_parts.query, keep_blank_values=True)
-                + [(nv["name"], nv["value"]) for nv in query]
+                parse_qsl(url_parts.query, keep_blank_values=True) + query_pairs,
+                doseq=True,
             )
         )
         url = url_parts.geturl()
@@ -149,8 +206,10 @@ def embed_iframes(magic: dict[str, list[MagicText]]) -> None:
             magic_rectangle, parameters.scale or None
         )
 
-        iframe_elem = ET.SubElement(foreign_object, f"{{{XHTML_NAMESPACE}}}iframe")
-        iframe_elem.attrib["style"] = "border: none; width: 100%; height: 100%;"
-        iframe_elem.attrib["src"] = parameters.url
+        iframe_attrib = {
+            "style": "border: none; width: 100%; height: 100%;",
+            "src": parameters.url,
+        }
         if parameters.name is not None:
-            iframe_elem.attrib["name"] = parameters.name
+            iframe_attrib["name"] = parameters.name
+        ET.SubElement(foreign_object, _XHTML_IFRAME_TAG, iframe_attrib)
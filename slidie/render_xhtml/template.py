@@ -16,17 +16,47 @@ helpful tracebacks in normal mode.
 from pathlib import Path
 from xml.etree import ElementTree as ET
 from base64 import b64encode
+from copy import deepcopy
+from functools import lru_cache
 import re
 
 from slidie.xml_namespaces import XHTML_NAMESPACE
 
 
+_XHTML_LINK_TAG = f"{{{XHTML_NAMESPACE}}}link"
+_XHTML_STYLE_TAG = f"{{{XHTML_NAMESPACE}}}style"
+_XHTML_SCRIPT_TAG = f"{{{XHTML_NAMESPACE}}}script"
+_XHTML_TEMPLATE_TAG = f"{{{XHTML_NAMESPACE}}}template"
+_XHTML_DIV_TAG = f"{{{XHTML_NAMESPACE}}}div"
+
+_SLIDES_CONTAINER_PATH = f".//{{{XHTML_NAMESPACE}}}*[@id='slides']"
+
+_SLIDE_STYLE = "display:block;width:100%;height:100%;"
+"""
+Style prepended to each slide's <svg> element to make it fill its container.
+"""
+
+_SOURCE_MAPPING_URL_RE = re.compile(
+    r"^(?P<prefix>\s*//#\s+sourceMappingURL=)(?P<filename>.+)$",
+    flags=re.MULTILINE,
+)
+
+
+@lru_cache(maxsize=256)
+def _read_asset(filename: Path) -> str:
+    """
+    Read a (UTF-8 encoded) CSS or Javascript asset file. Memoised since the
+    same assets are typically inlined on every render.
+    """
+    return filename.read_bytes().decode("utf-8")
+
+
 def inline_css(root: ET.Element, path: Path) -> None:
     """
     Substitute ``<link rel="stylesheet" href="..." />`` for
     ``<style>...</style>``.
     """
-    for elem in root.iterfind(f".//{{{XHTML_NAMESPACE}}}link"):
+    for elem in root.iter(_XHTML_LINK_TAG):
         if elem.attrib.get("rel") == "stylesheet":
             del elem.attrib["rel"]
 
@@ -34,9 +64,9 @@ def inline_css(root: ET.Element, path: Path) -> None:
             if href is None:
                 raise ValueError("Template <link> missing 'http'")
 
-            elem.tag = f"{{{XHTML_NAMESPACE}}}style"
-            css_filename = path / Path(href)
-            elem.text = css_filename.read_text()
+            elem.tag = _XHTML_STYLE_TAG
+            css_filename = path / href
+            elem.text = _read_asset(css_filename.resolve())
 
 
 def inline_sourcemap(script_filename: Path) -> str:
@@ -49,33 +79,40 @@ def inline_sourcemap(script_filename: Path) -> str:
     def convert_sourcemap_to_dataurl(match: re.Match) -> str:
         sourcemap_filename = script_filename.parent / match.group("filename")
         sourcemap = sourcemap_filename.read_bytes()
-        dataurl = f"data:application/json;base64,{b64encode(sourcemap).decode('ascii')}"
-        return f"{match.group('prefix')}{dataurl}"
+        # NB: Built in one go to avoid repeatedly copying the (potentially
+        # large) base64 encoded data
+        return "".join(
+            (
+                match.group("prefix"),
+                "data:application/json;base64,",
+                b64encode(sourcemap).decode("ascii"),
+            )
+        )
+
+    script = _read_asset(script_filename.resolve())
 
     # NB: This could potentially find false positives if we start including
     # multiline backtick strings with decoy source mapping URLs in our
     # sources... But lets assume we're not our own adversary...
-    return (
-        re.sub(
-            r"^(?P<prefix>\s*//#\s+sourceMappingURL=)(?P<filename>.+)$",
-            convert_sourcemap_to_dataurl,
-            script_filename.read_text(),
-            flags=re.MULTILINE,
-        ).rstrip()
-        + f"\n//# sourceURL={script_filename.name}\n"
-    )
+    #
+    # NB: The (cheap) substring test skips the regex scan entirely for
+    # scripts without any source map.
+    if "sourceMappingURL=" in script:
+        script = _SOURCE_MAPPING_URL_RE.sub(convert_sourcemap_to_dataurl, script)
+
+    return script.rstrip() + f"\n//# sourceURL={script_filename.name}\n"
 
 
 def inline_js(root: ET.Element, path: Path) -> None:
     """
     Substitute ``<script src="...">`` for ``<script>...</script>``.
     """
-    for elem in root.iterfind(f".//{{{XHTML_NAMESPACE}}}script"):
+    for elem in root.iter(_XHTML_SCRIPT_TAG):
         if "src" in elem.attrib:
             src = elem.attrib.pop("src")
             assert src is not None
 
-            script_filename = path / Path(src)
+            script_filename = path / src
             elem.text = inline_sourcemap(script_filename)
 
 
@@ -86,19 +123,31 @@ def inline_templates(root: ET.Element, path: Path, debug: bool) -> None:
     Note that the 'src' argument is not a non-standard attribute of the
     template tag which only has meaning in this module.
     """
-    for elem in root.iterfind(f".//{{{XHTML_NAMESPACE}}}template"):
+    for elem in root.iter(_XHTML_TEMPLATE_TAG):
         if "src" in elem.attrib:
             src = elem.attrib.pop("src")
             assert src is not None
 
-            template_path = path / Path(src)
-            template = ET.parse(template_path).getroot()
-            inline_or_replace_css_js_and_templates(  # Recurse!
-                template,
-                template_path.parent,
-                debug,
-            )
-            elem.append(template)
+            template_path = path / src
+            template = _load_template(template_path.resolve(), debug)
+            elem.append(deepcopy(template))
+
+
+@lru_cache(maxsize=64)
+def _load_template(template_path: Path, debug: bool) -> ET.Element:
+    """
+    Load a template file, inlining (or replacing) its CSS, JS and templates.
+
+    Memoised since the same template may be included several times. The
+    returned element is shared and so must be copied before use.
+    """
+    template = ET.parse(template_path).getroot()
+    inline_or_replace_css_js_and_templates(  # Recurse!
+        template,
+        template_path.parent,
+        debug,
+    )
+    return template
 
 
 def replace_css_paths_with_absolute_file_path(root: ET.Element, path: Path) -> None:
@@ -106,12 +155,12 @@ def replace_css_paths_with_absolute_file_path(root: ET.Element, path: Path) -> N
     Given an XHTML document, replace hrefs to local CSS files with file://...
     URLs with a full, absolute path.
     """
-    for elem in root.iterfind(f".//{{{XHTML_NAMESPACE}}}link"):
+    for elem in root.iter(_XHTML_LINK_TAG):
         if elem.attrib.get("rel") == "stylesheet":
             href = elem.attrib.pop("href")
             if href is None:
                 raise ValueError("Template <link> missing 'http'")
-            css_filename = path / Path(href)
+            css_filename = path / href
             elem.attrib["href"] = f"file://{css_filename.resolve()}"
 
 
@@ -120,11 +169,11 @@ def replace_js_paths_with_absolute_file_path(root: ET.Element, path: Path) -> No
     Given an XHTML document, replace hrefs to local CSS files with file://...
     URLs with a full, absolute path.
     """
-    for elem in root.iterfind(f".//{{{XHTML_NAMESPACE}}}script"):
+    for elem in root.iter(_XHTML_SCRIPT_TAG):
         if "src" in elem.attrib:
             src = elem.attrib.pop("src")
             assert src is not None
-            script_filename = path / Path(src)
+            script_filename = path / src
             elem.attrib["src"] = f"file://{script_filename.resolve()}"
 
 
@@ -163,7 +212,8 @@ def render_template(
     # <script> tags.
     inline_or_replace_css_js_and_templates(root, template.parent, debug)
 
-    (slides_container,) = root.findall(f".//{{{XHTML_NAMESPACE}}}*[@id='slides']")
+    slides_container = root.find(_SLIDES_CONTAINER_PATH)
+    assert slides_container is not None
 
     for slide in slides:
         # The following slightly mysterious structure invokes the
@@ -174,12 +224,12 @@ def render_template(
         # (mostly) isolated namespace and DOM for IDs, CSS and Javascript.
         slide_container = ET.SubElement(
             slides_container,
-            f"{{{XHTML_NAMESPACE}}}div",
+            _XHTML_DIV_TAG,
             {"class": "slide-container"},
         )
         template_elem = ET.SubElement(
             slide_container,
-            f"{{{XHTML_NAMESPACE}}}template",
+            _XHTML_TEMPLATE_TAG,
             {"shadowrootmode": "open"},
         )
         template_elem.append(slide)
@@ -189,8 +239,9 @@ def render_template(
         # This must be done explicitly here (rather than in CSS) because the
         # <svg> exists in its own isolated shadow DOM where the main document's
         # CSS cannot reach it.
-        slide.attrib[
-            "style"
-        ] = f"display:block;width:100%;height:100%;{slide.attrib.get('style', '')}"
+        if style := slide.get("style"):
+            slide.set("style", _SLIDE_STYLE + style)
+        else:
+            slide.set("style", _SLIDE_STYLE)
 
     return root
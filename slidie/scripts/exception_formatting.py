@@ -12,6 +12,10 @@ from traceback import format_exception_only
 
 module = __name__.partition(".")[0]
 
+_QUALIFIED_EXCEPTION_NAME_RE = re.compile(
+    r"^" + re.escape(module) + r"[^:]*\.([^.:]+):"
+)
+
 
 @contextmanager
 def slidie_exception_formatting(code: int = 1) -> Iterator[None]:
@@ -30,11 +34,7 @@ def slidie_exception_formatting(code: int = 1) -> Iterator[None]:
             msg = "".join(format_exception_only(exc))
 
             # Strip fully qualified exception name to just the class name
-            msg = re.sub(
-                r"^" + re.escape(module) + r"[^:]*\.([^.:]+):",
-                r"\1:",
-                msg,
-            )
+            msg = _QUALIFIED_EXCEPTION_NAME_RE.sub(r"\1:", msg)
 
             print(msg, end="", file=sys.stderr)
             sys.exit(code)
@@ -3,6 +3,9 @@ from xml.etree import ElementTree as ET
 from slidie.xml_namespaces import SVG_NAMESPACE
 
 
+_SVG_IMAGE_TAG = f"{{{SVG_NAMESPACE}}}image"
+
+
 def placeholder_to_image(svg: ET.Element, placeholder_id: str, data_url: str) -> None:
     """
     Given an SVG containing a magic video specification whose placeholder
@@ -13,15 +16,17 @@ def placeholder_to_image(svg: ET.Element, placeholder_id: str, data_url: str) ->
     (placeholder_elem,) = svg.findall(f".//*[@id={placeholder_id!r}]")
 
     # Turn into an <image>
-    placeholder_elem.tag = f"{{{SVG_NAMESPACE}}}image"
+    if placeholder_elem.tag != _SVG_IMAGE_TAG:
+        placeholder_elem.tag = _SVG_IMAGE_TAG
+
+        # Remove <rect>-specific attributes
+        placeholder_elem.attrib.pop("rx", None)
+        placeholder_elem.attrib.pop("ry", None)
+        placeholder_elem.attrib.pop("pathLength", None)
+
     placeholder_elem.attrib["href"] = data_url
 
     # Remove any <image> preserveAspectRatio attribute to
     # ensure image is centered and scaled within the defined
     # area.
     placeholder_elem.attrib.pop("preserveAspectRatio", None)
-
-    # Remove <rect>-specific attributes
-    placeholder_elem.attrib.pop("rx", None)
-    placeholder_elem.attrib.pop("ry", None)
-    placeholder_elem.attrib.pop("pathLength", None)
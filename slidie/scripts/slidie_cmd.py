@@ -4,17 +4,16 @@ supported output formats.
 """
 
 from argparse import ArgumentParser
+from functools import cache
 from pathlib import Path
 
 from slidie.file_numbering import enumerate_slides
 from slidie.scripts.exception_formatting import slidie_exception_formatting
 
-from slidie.render_xhtml import render_xhtml
-from slidie.render_pdf import render_pdf
-from slidie.render_png import render_png
 
-
-def main() -> None:
+@cache
+def _build_parser() -> ArgumentParser:
+    """Construct (and memoise) the argument parser used by :py:func:`main`."""
     parser = ArgumentParser(
         description="""
             Render a slidie slide show.
@@ -60,6 +59,27 @@ def main() -> None:
             images. (Ignored for other formats). Default: %(default)s.
         """,
     )
+    parser.add_argument(
+        "--cache-dir",
+        type=Path,
+        default=None,
+        help="""
+            A directory in which to cache rendered slides. When given, slides
+            whose source files (and linked image files) are unchanged since a
+            previous render with the same version of Inkscape are not
+            re-rendered. (Used for PDF and XHTML output only.)
+        """,
+    )
+    parser.add_argument(
+        "--jobs",
+        "-j",
+        type=int,
+        default=None,
+        help="""
+            The maximum number of slides to render concurrently. Defaults to
+            the number of CPUs. (Used for PDF and XHTML output only.)
+        """,
+    )
     parser.add_argument(
         "--debug",
         default=False,
@@ -70,6 +90,11 @@ def main() -> None:
         """,
     )
 
+    return parser
+
+
+def main() -> None:
+    parser = _build_parser()
     args = parser.parse_args()
 
     with slidie_exception_formatting():
@@ -80,12 +105,31 @@ def main() -> None:
             if svg_or_dir.is_dir():
                 sources.extend(enumerate_slides(svg_or_dir))
 
+        # NB: Renderers are imported only when used since some (e.g. PDF)
+        # have relatively expensive dependencies to import.
         match args.output.suffix:
             case ".xhtml":
-                render_xhtml(sources, args.output, args.debug)
+                from slidie.render_xhtml import render_xhtml
+
+                render_xhtml(
+                    sources,
+                    args.output,
+                    args.debug,
+                    jobs=args.jobs,
+                    cache_dir=args.cache_dir,
+                )
             case ".pdf":
-                render_pdf(sources, args.output)
+                from slidie.render_pdf import render_pdf
+
+                render_pdf(
+                    sources,
+                    args.output,
+                    jobs=args.jobs,
+                    cache_dir=args.cache_dir,
+                )
             case ".png":
+                from slidie.render_png import render_png
+
                 render_png(
                     sources,
                     args.output,
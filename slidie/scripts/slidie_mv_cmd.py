@@ -13,9 +13,13 @@ See :ref:`slidie-mv` for more detailed usage info.
 
 from typing import NamedTuple, Iterable
 
+import os
+import posixpath
 from argparse import ArgumentParser
+from functools import cache
+from bisect import bisect_left
 from pathlib import Path
-from subprocess import run, DEVNULL
+from subprocess import run
 
 from slidie.file_numbering import (
     enumerate_slides,
@@ -33,6 +37,13 @@ class FilesNotInSameDirectoryError(Exception):
     pass
 
 
+class GitUpdateIndexError(Exception):
+    """
+    Thrown if the git index could not be updated to reflect moved files (in
+    which case the files are moved back).
+    """
+
+
 def common_parent_directory(files: Iterable[Path]) -> Path:
     """
     Return the common parent directory of a collection of files.
@@ -40,7 +51,9 @@ def common_parent_directory(files: Iterable[Path]) -> Path:
     Raises ValueError if empty and FilesNotInSameDirectoryError if the files do
     not reside in a common parent directory.
     """
-    parent_dirs = {f.parent.resolve() for f in files}
+    # NB: Resolve each distinct (unresolved) parent only once since resolving
+    # requires filesystem accesses and typically all files share a parent.
+    parent_dirs = {parent.resolve() for parent in {f.parent for f in files}}
 
     if len(parent_dirs) == 0:
         raise ValueError("common_parent_directory() arg is empty")
@@ -56,25 +69,37 @@ class NumberingParams(NamedTuple):
     preferred_step_size: int
 
 
-def infer_numbering_parameters(slides: list[Path]) -> NumberingParams:
+def infer_numbering_parameters(prefixes: list[str]) -> NumberingParams:
     """
     Infer the existing numbering conventions in use using some fairly crude
     heuristics.
+
+    Takes the numerical prefixes of the existing slides, as they appear in
+    their filenames (see
+    :py:func:`slidie.file_numbering.extract_numerical_prefix_str`).
     """
     # This script should never make it past the argument parser if no slides
     # are defined so we won't bother handling that special case here!
-    assert slides
-
-    prefixes = list(map(extract_numerical_prefix_str, slides))
-    numbers = list(map(int, prefixes))
-
-    num_digits = max(map(len, prefixes))
-
-    allow_negative = any(n < 0 for n in numbers)
+    assert prefixes
+
+    num_digits = 0
+    allow_negative = False
+    max_leading_zeros = 0
+    for prefix in prefixes:
+        num_digits = max(num_digits, len(prefix))
+
+        # NB: Only parse the number when it might be negative (e.g. "-000" is
+        # not negative)
+        if not allow_negative and prefix.startswith("-"):
+            allow_negative = int(prefix) < 0
+
+        # As a heuristic we'll assume that a properly numbered set of files
+        # will always have at least one leading zero (e.g. allowing for 99
+        # slides).
+        max_leading_zeros = max(
+            max_leading_zeros, len(prefix) - len(prefix.lstrip("-0"))
+        )
 
-    # As a heuristic we'll assume that a properly numbered set of files will
-    # always have at least one leading zero (e.g. allowing for 99 slides).
-    max_leading_zeros = max(len(p) - len(p.lstrip("-0")) for p in prefixes)
     proper_num_digits = num_digits + (1 if max_leading_zeros == 0 else 0)
 
     # We can then make a decent guess at the step size based on the number of
@@ -90,21 +115,86 @@ def infer_numbering_parameters(slides: list[Path]) -> NumberingParams:
     )
 
 
-def move_file(src: Path, dst: Path, git_mv: bool = True) -> None:
+def move_files(moves: list[tuple[Path, Path]], git_mv: bool = True) -> None:
     """
-    Move a file from src to dst, attempting to use `git mv` and falling back on
-    an ordinary move if this fails (e.g. due to not being a file in Git).
+    Move a series of files from src to dst. Files in git are moved like `git
+    mv` would (but using a fixed number of git invocations rather than one per
+    file), other files (or all files when git_mv is False) are simply renamed.
+
+    All files must reside in the same directory. Raises FileExistsError,
+    without moving any files, if any destination already exists. Raises
+    GitUpdateIndexError, after moving the files back, if the git index could
+    not be updated.
     """
-    if dst.is_file():
-        raise FileExistsError(dst)
+    for _src, dst in moves:
+        if dst.is_file():
+            raise FileExistsError(dst)
+
+    if not moves:
+        return
 
+    directory = moves[0][0].parent
+
+    # Find the index entries (if any) for the files to be moved. Files not in
+    # git (or not in a git repository at all) will simply be missing.
+    #
+    # NB: Output lines have the form "<mode> <object> <stage>\t<filename>"
+    # where filename is relative to the root of the repository.
+    index_entries: dict[str, tuple[str, str, str]] = {}
     if git_mv:
-        result = run(["git", "mv", str(src), str(dst)], stdout=DEVNULL, stderr=DEVNULL)
-    if not git_mv or result.returncode != 0:
+        result = run(
+            ["git", "--literal-pathspecs", "ls-files", "-s", "-z", "--full-name"]
+            + ["--"]
+            + [src.name for src, _dst in moves],
+            cwd=directory,
+            capture_output=True,
+        )
+        if result.returncode == 0:
+            for entry in os.fsdecode(result.stdout).split("\0"):
+                if entry:
+                    info, _, filename = entry.partition("\t")
+                    mode, object_id, stage = info.split(" ")
+                    if stage == "0":  # Don't attempt to move unmerged files
+                        index_entries[posixpath.basename(filename)] = (
+                            mode,
+                            object_id,
+                            filename,
+                        )
+
+    for src, dst in moves:
         src.rename(dst)
 
+    # Move the index entries of git managed files to match (as `git mv` would)
+    if index_entries:
+        index_info = []
+        for src, dst in moves:
+            if index_entry := index_entries.get(src.name):
+                mode, object_id, filename = index_entry
+                dst_filename = posixpath.join(posixpath.dirname(filename), dst.name)
+                index_info.append(f"0 {'0' * len(object_id)}\t{filename}\0")
+                index_info.append(f"{mode} {object_id}\t{dst_filename}\0")
+        result = run(
+            ["git", "update-index", "-z", "--index-info"],
+            cwd=directory,
+            input=os.fsencode("".join(index_info)),
+            capture_output=True,
+        )
+        if result.returncode != 0:
+            # Put the files back so the working tree matches the (unchanged)
+            # index again
+            for src, dst in reversed(moves):
+                dst.rename(src)
+            raise GitUpdateIndexError(
+                result.stderr.decode("utf-8", errors="replace").strip()
+            )
 
-def main(cli_args: list[str] | None = None) -> None:
+
+@cache
+def _build_parser() -> ArgumentParser:
+    """
+    Construct the argument parser. Memoised since :py:func:`main` may be called
+    repeatedly (e.g. when used as a library or from tests).
+    """
     parser = ArgumentParser(
         description="""
             Reorder (i.e. renumber) slides within a show.
@@ -201,6 +291,11 @@ def main(cli_args: list[str] | None = None) -> None:
         """,
     )
 
+    return parser
+
+
+def main(cli_args: list[str] | None = None) -> None:
+    parser = _build_parser()
     args = parser.parse_args(cli_args)
 
     with slidie_exception_formatting():
@@ -220,25 +315,29 @@ def main(cli_args: list[str] | None = None) -> None:
             # Empty list provided: assume current working directory
             source_directory = Path(".")
 
-        slides = {
-            extract_numerical_prefix(f): f for f in enumerate_slides(source_directory)
-        }
+        slides = {}
+        prefixes = []
+        for f in enumerate_slides(source_directory):
+            prefix = extract_numerical_prefix_str(f)
+            prefixes.append(prefix)
+            slides[int(prefix)] = f
 
         # Remove the slides to be moved from the list
         moved_slides = {extract_numerical_prefix(f): f for f in args.slide}
-        static_slides = slides.copy()
-        for num in moved_slides:
-            del static_slides[num]
+        if moved_slides.keys() - slides.keys():
+            parser.error("slides to move must be existing slides")
+        static_slides = {num: f for num, f in slides.items() if num not in moved_slides}
         static_slide_numbers = sorted(static_slides)
 
         # Determine the pivot point
         if args.before or args.after:
             pivot_slide = args.before or args.after
-            try:
-                pivot_slide_number = static_slide_numbers.index(
-                    extract_numerical_prefix(pivot_slide)
-                )
-            except ValueError:
+            pivot_number = extract_numerical_prefix(pivot_slide)
+            pivot_slide_number = bisect_left(static_slide_numbers, pivot_number)
+            if (
+                pivot_slide_number == len(static_slide_numbers)
+                or static_slide_numbers[pivot_slide_number] != pivot_number
+            ):
                 parser.error(
                     "--before/--after must refer to a slide which isn't being moved"
                 )
@@ -252,7 +351,7 @@ def main(cli_args: list[str] | None = None) -> None:
             assert False  # Unreachable
 
         # Work out numbering
-        numbering_params = infer_numbering_parameters(list(slides.values()))
+        numbering_params = infer_numbering_parameters(prefixes)
         replacements, new_numbers = insert_numbers(
             existing_numbers=static_slide_numbers,
             position=pivot_slide_number,
@@ -293,17 +392,22 @@ def main(cli_args: list[str] | None = None) -> None:
         # into their final destinations. This avoids us accidentally overwriting
         # them when moving them to their final destinations.
         if not args.dry_run:
-            for old, _ in replacements:
-                move_file(
-                    slides[old],
-                    slides[old].parent / f"temp_{slides[old].name}",
-                    not args.no_git_mv,
-                )
-            for old, new in replacements:
-                move_file(
-                    slides[old].parent / f"temp_{slides[old].name}",
-                    replace_numerical_prefix(
-                        slides[old], new, numbering_params.num_digits
-                    ),
-                    not args.no_git_mv,
-                )
+            move_files(
+                [
+                    (slides[old], slides[old].parent / f"temp_{slides[old].name}")
+                    for old, _ in replacements
+                ],
+                not args.no_git_mv,
+            )
+            move_files(
+                [
+                    (
+                        slides[old].parent / f"temp_{slides[old].name}",
+                        replace_numerical_prefix(
+                            slides[old], new, numbering_params.num_digits
+                        ),
+                    )
+                    for old, new in replacements
+                ],
+                not args.no_git_mv,
+            )
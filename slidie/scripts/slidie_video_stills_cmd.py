@@ -9,30 +9,95 @@ from pathlib import Path
 from argparse import ArgumentParser
 from xml.etree import ElementTree as ET
 from copy import deepcopy
-from tempfile import TemporaryDirectory
-from base64 import b64encode
+from functools import cache, partial
+from binascii import b2a_base64
 
-from slidie.magic import extract_magic
+from slidie.magic import extract_magic, MAGIC_PREFIX
+from slidie.svg_utils import find_text_with_prefix
 from slidie.video import find_video_magic
-from slidie.ffmpeg import extract_video_frame
+from slidie.ffmpeg import extract_video_frame_bytes
+from slidie.parallel import parallel_map
 from slidie.xml_namespaces import SVG_NAMESPACE
 from slidie.scripts.placeholders import placeholder_to_image
 from slidie.scripts.exception_formatting import slidie_exception_formatting
 
 
-def video_to_data_url(url: str, time: float, cwd: Path | None) -> str:
+def video_to_data_url(
+    url: str, time: float, cwd: Path | None, jpeg: bool = False
+) -> str:
     """
     Given a video filename or URL, return a data URL containing a still from a
-    frame at the approximate time given.
+    frame at the approximate time given. The still is a PNG unless 'jpeg' is
+    True.
     """
-    with TemporaryDirectory() as tmp_dir:
-        tmp_png = Path(tmp_dir) / "frame.png"
-        extract_video_frame(url, tmp_png, time, cwd=cwd)
-        base64 = b64encode(tmp_png.read_bytes()).decode("ascii")
-        return f"data:image/png;base64,{base64}"
+    image = extract_video_frame_bytes(url, time, cwd=cwd, jpeg=jpeg)
+    mimetype = "image/jpeg" if jpeg else "image/png"
+    base64 = b2a_base64(image, newline=False).decode("ascii")
+    return f"data:{mimetype};base64,{base64}"
 
 
-def main(test_args: list[str] | None = None):
+def process_svg(filename: str, jpeg: bool = False) -> None:
+    """
+    Insert/update video stills in the named SVG file, in place (or stdin to
+    stdout if filename is '-'). Stills are inserted as JPEGs if 'jpeg' is
+    True, and PNGs otherwise.
+    """
+    try:
+        if filename == "-":
+            source_directory = None
+        else:
+            source_directory = Path(filename).parent
+
+        with open(filename, "rb") if filename != "-" else sys.stdin.buffer as f:
+            svg = ET.parse(f).getroot()
+
+        # NB: We work on a copy because extract_magic is a mutating
+        # operation (and find_video_magic depends on that mutation).
+        # The (relatively expensive) copy is skipped for SVGs
+        # containing no magic at all.
+        if next(find_text_with_prefix(svg, MAGIC_PREFIX), None) is None:
+            videos = []
+        else:
+            videos = find_video_magic(extract_magic(deepcopy(svg)))
+
+        mutated = False
+        for video in videos:
+            # Load still from video (just skipping this video if it fails)
+            try:
+                data_url = video_to_data_url(
+                    video.url, video.start or 10.0, cwd=source_directory, jpeg=jpeg
+                )
+            except Exception as exc:
+                rule = "-" * 80
+                print(
+                    f"Failed to load {video.url}, see ffmpeg output:\n{rule}\n{exc}\n{rule}",
+                    file=sys.stderr,
+                )
+                continue
+
+            # Replace placeholder with image
+            placeholder_id = video.magic_rectangle.rectangle.attrib["id"]
+            placeholder_to_image(svg, placeholder_id, data_url)
+            mutated = True
+
+        # NB: Files are left untouched when no stills were inserted (but stdin
+        # is always copied to stdout).
+        if not mutated and filename != "-":
+            return
+
+        with open(filename, "wb") if filename != "-" else sys.stdout.buffer as f:
+            ET.ElementTree(svg).write(f, encoding="utf-8")
+    except Exception as exc:
+        exc.add_note(f"While processing {filename}")
+        raise
+
+
+@cache
+def _build_parser() -> ArgumentParser:
+    """
+    Construct the argument parser (memoised since construction is relatively
+    costly and the parser is reused between calls to :py:func:`main`).
+    """
     parser = ArgumentParser(
         description="""
             Insert/update video stills into video magic text areas within an
@@ -42,54 +107,64 @@ def main(test_args: list[str] | None = None):
     parser.add_argument(
         "svg",
         nargs="*",
-        default=[str(p) for p in Path().glob("*.svg")],
+        default=[],
         help="""
-            The SVG to process (modifies the SVG in-place). Use '-' for stdin.
-            Defaults to all SVGs in current directory.
+            The SVG to process (modifies the SVG in-place). Use '-' for stdin
+            (which is processed after all other files). Defaults to all SVGs
+            in current directory.
         """,
     )
+    parser.add_argument(
+        "--jobs",
+        "-j",
+        type=int,
+        default=None,
+        help="""
+            The maximum number of SVGs to process concurrently. Defaults to
+            the number of CPUs.
+        """,
+    )
+    parser.add_argument(
+        "--jpeg",
+        action="store_true",
+        default=False,
+        help="""
+            Insert stills as (high quality) JPEGs rather than PNGs. This
+            typically results in substantially smaller SVGs (and slide shows).
+        """,
+    )
+
+    return parser
+
+
+def main(test_args: list[str] | None = None):
+    parser = _build_parser()
     args = parser.parse_args(test_args)
 
+    # NB: Default chosen here (not via the (memoised) parser) since it depends
+    # on the current working directory.
+    if not args.svg:
+        args.svg = [str(p) for p in Path().glob("*.svg")]
+
     with slidie_exception_formatting():
+        # NB: Each SVG is processed independently (with most time spent
+        # waiting on ffmpeg) so files are processed concurrently. Stdin is
+        # processed separately, on the calling thread, after all files.
+        #
+        # NB: Files given more than once (possibly via different paths) are
+        # processed only once since concurrently rewriting the same file
+        # would clobber it.
+        filenames: dict[Path, str] = {}
         for filename in args.svg:
-            try:
-                if filename == "-":
-                    source_directory = None
-                else:
-                    source_directory = Path(filename).parent
-
-                with open(filename, "rb") if filename != "-" else sys.stdin.buffer as f:
-                    svg = ET.parse(f).getroot()
-
-                # NB: We work on a copy because extract_magic is a mutating
-                # operation (and find_video_magic depends on that mutation)
-                videos = find_video_magic(extract_magic(deepcopy(svg)))
-
-                for video in videos:
-                    # Load still from video (just skipping this video if it fails)
-                    try:
-                        data_url = video_to_data_url(
-                            video.url, video.start or 10.0, cwd=source_directory
-                        )
-                    except Exception as exc:
-                        rule = "-" * 80
-                        print(
-                            f"Failed to load {video.url}, see ffmpeg output:\n{rule}\n{exc}\n{rule}",
-                            file=sys.stderr,
-                        )
-                        continue
-
-                    # Replace placeholder with image
-                    placeholder_id = video.magic_rectangle.rectangle.attrib["id"]
-                    placeholder_to_image(svg, placeholder_id, data_url)
-
-                with open(
-                    filename, "wb"
-                ) if filename != "-" else sys.stdout.buffer as f:
-                    ET.ElementTree(svg).write(f, encoding="utf-8")
-            except Exception as exc:
-                exc.add_note(f"While processing {filename}")
-                raise
+            if filename != "-":
+                filenames.setdefault(Path(filename).resolve(), filename)
+        parallel_map(
+            partial(process_svg, jpeg=args.jpeg),
+            filenames.values(),
+            jobs=args.jobs,
+        )
+        if "-" in args.svg:
+            process_svg("-", jpeg=args.jpeg)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,115 @@
+"""
+Support for caching rendered slides between runs.
+
+Cache entries are keyed on the contents of a slide's source SVG file and any
+files it links to (e.g. linked images, which Inkscape embeds in its output),
+along with the slidie and Inkscape versions and an identifier for the kind of
+rendering cached. As such, entries never require explicit invalidation: a
+changed slide simply gets a new key.
+"""
+
+from typing import Iterable, Mapping
+
+from pathlib import Path
+from urllib.parse import urlparse, unquote
+
+import os
+import hashlib
+import shutil
+from tempfile import mkdtemp
+from xml.etree import ElementTree as ET
+
+from slidie import __version__
+from slidie.xml_namespaces import SVG_NAMESPACE, SODIPODI_NAMESPACE, XLINK_NAMESPACE
+
+
+_SVG_IMAGE_TAG = f"{{{SVG_NAMESPACE}}}image"
+_XLINK_HREF_ATTR = f"{{{XLINK_NAMESPACE}}}href"
+_SODIPODI_ABSREF_ATTR = f"{{{SODIPODI_NAMESPACE}}}absref"
+
+
+def find_linked_files(svg: ET.Element, directory: Path) -> list[Path]:
+    """
+    Find the local files linked to by <image> elements in an SVG (whose
+    contents will be embedded by Inkscape when rendering). Relative links are
+    resolved relative to the given directory (i.e. that containing the SVG).
+
+    Both the image's link and any Inkscape (sodipodi:absref) absolute path
+    fallback are included. The listed files need not exist.
+    """
+    linked_files = []
+    for image in svg.iter(_SVG_IMAGE_TAG):
+        href = image.get("href") or image.get(_XLINK_HREF_ATTR)
+        if href:
+            url = urlparse(href)
+            if url.scheme in ("", "file") and url.path:
+                linked_files.append(directory / unquote(url.path))
+
+        if absref := image.get(_SODIPODI_ABSREF_ATTR):
+            linked_files.append(Path(absref))
+
+    return linked_files
+
+
+def get_cache_key(
+    svg_bytes: bytes,
+    format_id: str,
+    inkscape_version: str = "",
+    linked_files: Iterable[Path] = (),
+) -> str:
+    """
+    Compute the cache key for a slide whose SVG file has the given contents.
+
+    The format_id identifies the kind of rendering being cached (e.g. "pdf-1")
+    and must be changed whenever a change to that rendering process would make
+    existing cache entries invalid.
+
+    The inkscape_version should give the version of Inkscape used for
+    rendering (see :py:func:`slidie.inkscape.get_inkscape_version`) and
+    linked_files the files the slide links to (see
+    :py:func:`find_linked_files`). The contents of these files (or their
+    absence) form part of the key.
+    """
+    h = hashlib.blake2b(digest_size=16)
+    h.update(f"{__version__}\0{format_id}\0{inkscape_version}\0".encode("utf-8"))
+    h.update(svg_bytes)
+
+    # NB: The SVG cannot contain NUL characters so this is unambiguous
+    for filename in linked_files:
+        h.update(b"\0" + os.fsencode(filename) + b"\0")
+        try:
+            h.update(hashlib.blake2b(filename.read_bytes()).digest())
+        except OSError:
+            h.update(b"missing")
+
+    return h.hexdigest()
+
+
+def write_cache_entry(cache_entry: Path, files: Mapping[str, bytes | Path]) -> None:
+    """
+    Create a cache entry: a directory containing the named files. Each file
+    is given either as its contents or as the path of a file to copy. Does
+    nothing if the entry already exists.
+
+    The entry is populated under a temporary name and then renamed into place
+    so that a partially written entry is never visible (e.g. to a concurrent
+    reader, or after an interruption).
+    """
+    cache_entry.parent.mkdir(parents=True, exist_ok=True)
+
+    tmp_entry = Path(mkdtemp(dir=cache_entry.parent, prefix=".tmp-"))
+    try:
+        for name, contents in files.items():
+            if isinstance(contents, Path):
+                shutil.copyfile(contents, tmp_entry / name)
+            else:
+                (tmp_entry / name).write_bytes(contents)
+
+        try:
+            tmp_entry.rename(cache_entry)
+        except OSError:
+            # Entry already exists (e.g. an identical slide rendered
+            # concurrently)
+            pass
+    finally:
+        shutil.rmtree(tmp_entry, ignore_errors=True)
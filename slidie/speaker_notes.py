@@ -1,3 +1,5 @@
+from typing import Iterable
+
 from xml.etree import ElementTree as ET
 
 import json
@@ -6,7 +8,14 @@ from slidie.xml_namespaces import SLIDIE_NAMESPACE
 from slidie.svg_utils import find_text_with_prefix, get_visible_build_steps
 
 
-def extract_speaker_notes(svg: ET.Element) -> list[tuple[tuple[int, ...] | None, str]]:
+SPEAKER_NOTES_PREFIX = "###\n"
+"""The prefix which identifies <text> elements containing speaker notes."""
+
+
+def extract_speaker_notes(
+    svg: ET.Element,
+    found: Iterable[tuple[tuple[ET.Element, ...], str]] | None = None,
+) -> list[tuple[tuple[int, ...] | None, str]]:
     """
     Find (and remove) the speaker notes within magic '###' <text> elements
     within an SVG. Returns a list [(steps, note), ...] where 'note' is a string
@@ -20,21 +29,34 @@ def extract_speaker_notes(svg: ET.Element) -> list[tuple[tuple[int, ...] | None,
     The extracted speaker notes are returned in the order in which they
     appeared in the SVG.
 
+    If the speaker note <text> elements have already been located (e.g. using
+    :py:func:`slidie.svg_utils.find_text_with_prefixes` with
+    :py:data:`SPEAKER_NOTES_PREFIX`), these may be passed as 'found' to avoid
+    searching the document again.
     """
+    if found is None:
+        found = find_text_with_prefix(svg, SPEAKER_NOTES_PREFIX)
+
     notes = []
 
-    # NB: Capture in list to allow safe mutation as we iterate
-    for elems, text in list(find_text_with_prefix(svg, "###\n")):
+    to_remove = []
+    for elems, text in found:
         steps = get_visible_build_steps(elems)
         notes.append((steps, text))
+        to_remove.append((elems[-2], elems[-1]))
 
-        # Remove the <text> element from the document
-        elems[-2].remove(elems[-1])
+    # Remove the <text> elements from the document (NB: deferred until the
+    # search completes since the tree must not be mutated during traversal)
+    for parent, elem in to_remove:
+        parent.remove(elem)
 
     return notes
 
 
-def embed_speaker_notes(svg: ET.Element) -> None:
+def embed_speaker_notes(
+    svg: ET.Element,
+    found: Iterable[tuple[tuple[ET.Element, ...], str]] | None = None,
+) -> None:
     """
     Find all speaker notes in magic '###' prefixed <text> elements (see
     :py:func:`extract_speaker_notes`) and add an XML structure as follows to
@@ -52,9 +74,12 @@ def embed_speaker_notes(svg: ET.Element) -> None:
     When :py:func:`slidie.svg_utils.annotate_build_steps` has been used, notes
     which appear on a layer with a build spec are also labelled with a 'steps'
     attribute containing a JSON list of step numbers.
+
+    The optional 'found' argument is passed to
+    :py:func:`extract_speaker_notes`.
     """
     notes_elem = ET.SubElement(svg, f"{{{SLIDIE_NAMESPACE}}}notes")
-    for steps, text in extract_speaker_notes(svg):
+    for steps, text in extract_speaker_notes(svg, found):
         note_elem = ET.SubElement(notes_elem, f"{{{SLIDIE_NAMESPACE}}}note")
         note_elem.text = text
         if steps is not None:
@@ -2,11 +2,14 @@
 Utilities for probing and interacting with (primarily) Inkscape-derrived SVGs.
 """
 
-from typing import NamedTuple, Iterator, Iterable
+from typing import Any, NamedTuple, Iterator, Iterable
 
 from xml.etree import ElementTree as ET
 from copy import deepcopy
+from collections import deque
+from functools import lru_cache
 import json
+import reprlib
 
 from slidie.builds import evaluate_build_steps
 
@@ -18,22 +21,74 @@ from slidie.xml_namespaces import (
 )
 
 
+_SVG_TAG_PREFIX = f"{{{SVG_NAMESPACE}}}"
+_SVG_TEXT_TAG = f"{{{SVG_NAMESPACE}}}text"
+_SVG_G_TAG = f"{{{SVG_NAMESPACE}}}g"
+_SVG_RECT_TAG = f"{{{SVG_NAMESPACE}}}rect"
+
+_INKSCAPE_GROUPMODE_ATTR = f"{{{INKSCAPE_NAMESPACE}}}groupmode"
+_INKSCAPE_LABEL_ATTR = f"{{{INKSCAPE_NAMESPACE}}}label"
+
+_SLIDIE_STEPS_ATTR = f"{{{SLIDIE_NAMESPACE}}}steps"
+_SLIDIE_TAGS_ATTR = f"{{{SLIDIE_NAMESPACE}}}tags"
+
+_NAMED_VIEW_PATH = f".//{{{SODIPODI_NAMESPACE}}}namedview"
+_INKSCAPE_PAGE_PATH = f"{_NAMED_VIEW_PATH}/{{{INKSCAPE_NAMESPACE}}}page"
+_BUILD_ELEMENTS_PATH = f".//{{{SVG_NAMESPACE}}}*[@{_SLIDIE_STEPS_ATTR}]"
+_TSPAN_PATH = f".//{{{SVG_NAMESPACE}}}tspan"
+_LINE_TSPAN_PATH = f"{_TSPAN_PATH}[@{{{SODIPODI_NAMESPACE}}}role='line']"
+
+_NON_RENDERED_CONTAINER_TAGS = frozenset(
+    f"{{{SVG_NAMESPACE}}}{tag}"
+    for tag in (
+        "defs",
+        "style",
+        "filter",
+        "linearGradient",
+        "radialGradient",
+        "marker",
+        "clipPath",
+        "pattern",
+        "mask",
+    )
+)
+"""
+SVG elements whose contents are not directly rendered (and therefore never
+contain text we're interested in).
+"""
+
+
 class InkscapeLayer(NamedTuple):
     element: ET.Element
     children: list["InkscapeLayer"]
 
     def __repr__(self) -> str:
-        if self.children:
-            return f"<InkscapeLayer {get_inkscape_layer_name(self.element)!r} {self.children!r}>"
+        return _inkscape_layer_repr.repr(self)
+
+
+class _InkscapeLayerRepr(reprlib.Repr):
+    """
+    Produces size-limited reprs of :py:class:`InkscapeLayer` hierarchies (e.g.
+    eliding long lists of layers and deeply nested layers).
+    """
+
+    def repr_InkscapeLayer(self, layer: InkscapeLayer, level: int) -> str:
+        name = get_inkscape_layer_name(layer.element)
+        if layer.children:
+            children = self.repr1(layer.children, level)
+            return f"<InkscapeLayer {name!r} {children}>"
         else:
-            return f"<InkscapeLayer {get_inkscape_layer_name(self.element)!r}>"
+            return f"<InkscapeLayer {name!r}>"
+
+
+_inkscape_layer_repr = _InkscapeLayerRepr()
 
 
 def is_inkscape_layer(elem: ET.Element) -> bool:
     """Test whether an element is an Inkscape layer."""
     return (
-        elem.tag == f"{{{SVG_NAMESPACE}}}g"
-        and elem.attrib.get(f"{{{INKSCAPE_NAMESPACE}}}groupmode", None) == "layer"
+        elem.tag == _SVG_G_TAG
+        and elem.attrib.get(_INKSCAPE_GROUPMODE_ATTR, None) == "layer"
     )
 
 
@@ -43,19 +98,31 @@ def enumerate_inkscape_layers(root: ET.Element) -> list[InkscapeLayer]:
     shown in Inkscape's Layers view (i.e. reverse drawing order).
     """
     layers: list[InkscapeLayer] = []
-    to_visit: list[tuple[list[InkscapeLayer], ET.Element]] = [(layers, root)]
+    to_visit: deque[tuple[list[InkscapeLayer], ET.Element]] = deque([(layers, root)])
+
+    # NB: Layers are appended in document (i.e. drawing) order and each list
+    # reversed at the end (rather than repeatedly inserting at the start).
+    layer_lists = [layers]
 
+    # NB: The is_inkscape_layer test is inlined (using local variables) since
+    # this loop visits every element in the document.
+    g_tag = _SVG_G_TAG
+    groupmode_attr = _INKSCAPE_GROUPMODE_ATTR
     while to_visit:
-        parent, element = to_visit.pop(0)
-        if is_inkscape_layer(element):
+        parent, element = to_visit.popleft()
+        if element.tag == g_tag and element.get(groupmode_attr) == "layer":
             layer = InkscapeLayer(element, [])
-            parent.insert(0, layer)
+            parent.append(layer)
+            layer_lists.append(layer.children)
             for child in element:
                 to_visit.append((layer.children, child))
         else:
             for child in element:
                 to_visit.append((parent, child))
 
+    for layer_list in layer_lists:
+        layer_list.reverse()
+
     return layers
 
 
@@ -65,48 +132,69 @@ def iter_layers(layers: list[InkscapeLayer]) -> Iterator[ET.Element]:
     :py:func:`enumerate_inkscape_layers`), iterate over the layers in a
     flattened fashion in the order they are displayed in the Inkscape GUI.
     """
-    for layer in layers:
+    # NB: Iterative (rather than recursive) to avoid creating a generator per
+    # layer
+    to_visit = layers[::-1]
+    while to_visit:
+        layer = to_visit.pop()
         yield layer.element
-        for child in layer.children:
-            yield from iter_layers([child])
+        to_visit.extend(reversed(layer.children))
 
 
 def get_inkscape_layer_name(layer: ET.Element) -> str:
     """Get the layer name from an Inkscape layer <g>."""
-    name = layer.attrib.get(f"{{{INKSCAPE_NAMESPACE}}}label")
+    name = layer.attrib.get(_INKSCAPE_LABEL_ATTR)
     assert name is not None
     return name
 
 
-def enumerate_elem_parents(root: ET.Element, target: ET.Element) -> list[ET.Element]:
+def build_parent_map(root: ET.Element) -> dict[ET.Element, ET.Element]:
+    """
+    Build a dictionary mapping from every element beneath root to its parent.
+    """
+    return {child: parent for parent in root.iter() for child in parent}
+
+
+def enumerate_elem_parents(
+    root: ET.Element,
+    target: ET.Element,
+    parent_map: dict[ET.Element, ET.Element] | None = None,
+) -> list[ET.Element]:
     """
     Given an element, return a list [root, ..., target] giving the complete
     hiearchy of elements.
+
+    When looking up the parents of many elements, a parent map built using
+    :py:func:`build_parent_map` may be provided to avoid searching the
+    document each time.
     """
+    if parent_map is None:
+        parent_map = build_parent_map(root)
 
-    def find(elem: ET.Element, parents: list[ET.Element]) -> list[ET.Element] | None:
-        elem_path = parents + [elem]
-        if elem is target:
-            return elem_path
-        else:
-            for child in elem:
-                if result := find(child, elem_path):
-                    return result
-            return None
+    parents = [target]
+    while (parent := parent_map.get(parents[-1])) is not None:
+        parents.append(parent)
+    assert parents[-1] is root
 
-    parents = find(root, [])
-    assert parents is not None
+    parents.reverse()
     return parents
 
 
-def get_elem_inksape_layers(svg: ET.Element, elem: ET.Element) -> tuple[str, ...]:
+def get_elem_inksape_layers(
+    svg: ET.Element,
+    elem: ET.Element,
+    parent_map: dict[ET.Element, ET.Element] | None = None,
+) -> tuple[str, ...]:
     """
     Given an element, return the hierarchy of layer names that element resides
     in.
+
+    The optional parent_map argument is passed to
+    :py:func:`enumerate_elem_parents`.
     """
     return tuple(
         get_inkscape_layer_name(elem)
-        for elem in enumerate_elem_parents(svg, elem)
+        for elem in enumerate_elem_parents(svg, elem, parent_map)
         if is_inkscape_layer(elem)
     )
 
@@ -128,9 +216,19 @@ def annotate_build_steps(svg: ET.Element) -> None:
 
     for layer, (steps, tags) in zip(layers, layer_steps):
         if steps is not None:
-            layer.set(f"{{{SLIDIE_NAMESPACE}}}steps", json.dumps(steps))
+            layer.set(_SLIDIE_STEPS_ATTR, json.dumps(steps))
         if tags:
-            layer.set(f"{{{SLIDIE_NAMESPACE}}}tags", json.dumps(sorted(tags)))
+            layer.set(_SLIDIE_TAGS_ATTR, json.dumps(sorted(tags)))
+
+
+@lru_cache(maxsize=1024)
+def _load_json_array(json_str: str) -> tuple[Any, ...]:
+    """
+    Decode a JSON array (e.g. a slidie:steps or slidie:tags attribute value).
+    Memoised since the same few values typically appear on many elements and
+    are decoded repeatedly.
+    """
+    return tuple(json.loads(json_str))
 
 
 def find_build_elements(svg: ET.Element) -> dict[ET.Element, list[int]]:
@@ -139,35 +237,50 @@ def find_build_elements(svg: ET.Element) -> dict[ET.Element, list[int]]:
     SVG element to build steps.
     """
     return {
-        elem: json.loads(elem.attrib[f"{{{SLIDIE_NAMESPACE}}}steps"])
-        for elem in svg.findall(
-            f".//{{{SVG_NAMESPACE}}}*[@{{{SLIDIE_NAMESPACE}}}steps]"
-        )
+        elem: list(_load_json_array(elem.attrib[_SLIDIE_STEPS_ATTR]))
+        for elem in svg.findall(_BUILD_ELEMENTS_PATH)
     }
 
 
-def get_build_step_range(svg: ET.Element) -> range:
+def get_build_step_range(
+    svg: ET.Element, build_elements: dict[ET.Element, list[int]] | None = None
+) -> range:
     """
     Get a range covering all of the build step numbers for a given slide (as
     annotated in slidie:steps attributes).
+
+    If the result of :py:func:`find_build_elements` is already to hand it may
+    be passed as 'build_elements' to avoid searching the document again.
     """
+    if build_elements is None:
+        build_elements = find_build_elements(svg)
+
     # NB: We include the starting [0] firstly to handle the case where no
     # builds are used and secondly to constrain the step indices to include zero
     # (which is always present).
-    steps_and_zero = sum(find_build_elements(svg).values(), start=[0])
+    steps_and_zero = [0]
+    for steps in build_elements.values():
+        steps_and_zero.extend(steps)
     return range(min(steps_and_zero), max(steps_and_zero) + 1)
 
 
-def get_build_tags(svg: ET.Element) -> dict[str, set[int]]:
+def get_build_tags(
+    svg: ET.Element, build_elements: dict[ET.Element, list[int]] | None = None
+) -> dict[str, set[int]]:
     """
     Returns the step numbers associated with each build spec tag.
+
+    If the result of :py:func:`find_build_elements` is already to hand it may
+    be passed as 'build_elements' to avoid searching the document again.
     """
+    if build_elements is None:
+        build_elements = find_build_elements(svg)
+
     out: dict[str, set[int]] = {}
 
-    for elem, steps in find_build_elements(svg).items():
-        for tag in json.loads(elem.get(f"{{{SLIDIE_NAMESPACE}}}tags", "[]")):
-            for step in steps:
-                out.setdefault(tag, set()).add(step)
+    for elem, steps in build_elements.items():
+        for tag in _load_json_array(elem.get(_SLIDIE_TAGS_ATTR, "[]")):
+            out.setdefault(tag, set()).update(steps)
 
     return out
 
@@ -183,8 +296,8 @@ def get_visible_build_steps(parents: Iterable[ET.Element]) -> tuple[int, ...] |
     steps: set[int] | None = None
 
     for elem in parents:
-        if steps_json := elem.attrib.get(f"{{{SLIDIE_NAMESPACE}}}steps"):
-            this_steps = set(json.loads(steps_json))
+        if steps_json := elem.attrib.get(_SLIDIE_STEPS_ATTR):
+            this_steps = set(_load_json_array(steps_json))
             if steps is not None:
                 steps &= this_steps
             else:
@@ -201,7 +314,7 @@ def get_inkscape_page_colour(svg: ET.Element) -> str | None:
     Get the Inkscape page colour specified in an SVG, or None for a
     non-Inkscape SVG.
     """
-    named_view = svg.find(f".//{{{SODIPODI_NAMESPACE}}}namedview")
+    named_view = svg.find(_NAMED_VIEW_PATH)
     if named_view is None:  # Probably not an Inkscape SVG
         return None
     return named_view.get("pagecolor", None)
@@ -214,10 +327,19 @@ class ViewBox(NamedTuple):
     height: float
 
 
+@lru_cache(maxsize=128)
+def _parse_view_box(view_box_str: str) -> ViewBox:
+    """
+    Parse a viewBox attribute value. Memoised since the same SVG's viewBox is
+    typically looked up several times during rendering.
+    """
+    return ViewBox(*map(float, view_box_str.split()))
+
+
 def get_view_box(svg: ET.Element) -> ViewBox | None:
     """Get the view box for an SVG (if defined)."""
     if view_box_str := svg.get("viewBox", None):
-        return ViewBox(*map(float, view_box_str.split()))
+        return _parse_view_box(view_box_str)
     else:
         return None
 
@@ -243,9 +365,7 @@ def get_inkscape_pages(svg: ET.Element) -> list[ViewBox]:
             float(page_elem.get("width", 0)),
             float(page_elem.get("height", 0)),
         )
-        for page_elem in svg.findall(
-            f".//{{{SODIPODI_NAMESPACE}}}namedview/{{{INKSCAPE_NAMESPACE}}}page"
-        )
+        for page_elem in svg.findall(_INKSCAPE_PAGE_PATH)
     ]
 
 
@@ -261,8 +381,8 @@ def fill_inkscape_page_background(svg: ET.Element) -> None:
         if view_box := get_view_box(svg):
             pages.append(view_box)
 
-        for page in set(pages):
-            rect = ET.Element(f"{{{SVG_NAMESPACE}}}rect")
+        for page in dict.fromkeys(pages):
+            rect = ET.Element(_SVG_RECT_TAG)
             rect.set("x", str(page.x))
             rect.set("y", str(page.y))
             rect.set("width", str(page.width))
@@ -289,8 +409,8 @@ def clip_to_inkscape_pages(svg: ET.Element) -> None:
     defs = ET.SubElement(svg, f"{{{SVG_NAMESPACE}}}defs")
     clip_path = ET.SubElement(defs, f"{{{SVG_NAMESPACE}}}clipPath")
     clip_path.attrib["id"] = "slidie-clip-to-inkscpae-pages-clip-path"
-    for page in set(pages):
-        rect = ET.SubElement(clip_path, f"{{{SVG_NAMESPACE}}}rect")
+    for page in dict.fromkeys(pages):
+        rect = ET.SubElement(clip_path, _SVG_RECT_TAG)
         rect.set("x", str(page.x))
         rect.set("y", str(page.y))
         rect.set("width", str(page.width))
@@ -320,7 +440,7 @@ def extract_multiline_text(text: ET.Element) -> str:
     new line.
 
     """
-    if text.tag != f"{{{SVG_NAMESPACE}}}text":
+    if text.tag != _SVG_TEXT_TAG:
         raise TypeError("Expected an SVG <text> element")
 
     # Best case: The text includes newline literals which we will assume
@@ -337,9 +457,7 @@ def extract_multiline_text(text: ET.Element) -> str:
     # tspans.
     text = deepcopy(text)
     first_annotated_tspan = None
-    for elem in text.iterfind(
-        f".//{{{SVG_NAMESPACE}}}tspan[@{{{SODIPODI_NAMESPACE}}}role='line']"
-    ):
+    for elem in text.iterfind(_LINE_TSPAN_PATH):
         elem.text = "\n" + (elem.text or "")
 
         if first_annotated_tspan is None:
@@ -372,7 +490,7 @@ def extract_multiline_text(text: ET.Element) -> str:
     # coordinates and looking at those) but lets keep things simple until a
     # concrete case comes up...
     first_line_tspan = None
-    for elem in text.iterfind(f".//{{{SVG_NAMESPACE}}}tspan"):
+    for elem in text.iterfind(_TSPAN_PATH):
         if "y" in elem.attrib or "dy" in elem.attrib:
             elem.text = "\n" + (elem.text or "")
             if first_line_tspan is None:
@@ -385,10 +503,43 @@ def extract_multiline_text(text: ET.Element) -> str:
     return "".join(text.itertext())
 
 
+def _iter_svg_text_elems(
+    root: ET.Element,
+) -> Iterator[tuple[list[ET.Element], ET.Element]]:
+    """
+    Iterate over all <text> elements in a document which are not nested within
+    non-SVG elements or non-rendered containers (e.g. <defs> or <clipPath>).
+
+    Generates (parents, text_elem) pairs where 'parents' gives the elements
+    from 'root' down to (but not including) the <text> element.
+    """
+    # NB: Rather than walking the tree in Python, we use ElementTree's (C
+    # implemented) iter() both to find the <text> elements and to build a
+    # child-to-parent lookup from which their ancestry is reconstructed.
+    parent_map: dict[ET.Element, ET.Element] | None = None
+    for elem in root.iter(_SVG_TEXT_TAG):
+        if parent_map is None:
+            parent_map = {child: parent for parent in root.iter() for child in parent}
+
+        parents = []
+        ancestor = elem
+        while ancestor is not root:
+            ancestor = parent_map[ancestor]
+            parents.append(ancestor)
+        parents.reverse()
+
+        if all(
+            parent.tag.startswith(_SVG_TAG_PREFIX)
+            and parent.tag not in _NON_RENDERED_CONTAINER_TAGS
+            and parent.tag != _SVG_TEXT_TAG
+            for parent in parents
+        ):
+            yield (parents, elem)
+
+
 def find_text_with_prefix(
     root: ET.Element,
     prefix: str,
-    _parents: tuple[ET.Element, ...] = (),
 ) -> Iterator[tuple[tuple[ET.Element, ...], str]]:
     """
     Iterate over all text blocks within a document with the given prefix.
@@ -399,13 +550,34 @@ def find_text_with_prefix(
     until the matched <text> block. This may be useful for 'magic' text objects
     which are sensitive to sibling or parent objects (since ElementTree doesn't
     include parent references!).
-
-    The _parents argument is for internal use only.
     """
-    if root.tag == f"{{{SVG_NAMESPACE}}}text":
-        text = extract_multiline_text(root)
+    for parents, elem in _iter_svg_text_elems(root):
+        text = extract_multiline_text(elem)
         if text.startswith(prefix):
-            yield (_parents + (root,), text.removeprefix(prefix))
-    elif root.tag.startswith(f"{{{SVG_NAMESPACE}}}"):
-        for child in root:
-            yield from find_text_with_prefix(child, prefix, _parents + (root,))
+            yield ((*parents, elem), text.removeprefix(prefix))
+
+
+def find_text_with_prefixes(
+    root: ET.Element,
+    prefixes: Iterable[str],
+) -> dict[str, list[tuple[tuple[ET.Element, ...], str]]]:
+    """
+    Find all text blocks within a document starting with any of several
+    prefixes, in a single pass.
+
+    Returns a dictionary from each prefix to the list of (path, str) pairs
+    which :py:func:`find_text_with_prefix` would produce for that prefix. Text
+    blocks matching more than one prefix are only listed under the first
+    matching prefix given.
+    """
+    out: dict[str, list[tuple[tuple[ET.Element, ...], str]]] = {
+        prefix: [] for prefix in prefixes
+    }
+    for parents, elem in _iter_svg_text_elems(root):
+        text = extract_multiline_text(elem)
+        for prefix, found in out.items():
+            if text.startswith(prefix):
+                found.append(((*parents, elem), text.removeprefix(prefix)))
+                break
+
+    return out
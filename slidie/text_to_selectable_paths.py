@@ -13,6 +13,12 @@ from slidie.xml_namespaces import SVG_NAMESPACE
 from slidie.inkscape import Inkscape, open_etree_in_inkscape
 
 
+_SVG_TEXT_TAG = f"{{{SVG_NAMESPACE}}}text"
+_SVG_TSPAN_TAG = f"{{{SVG_NAMESPACE}}}tspan"
+
+_ELEMENTS_WITH_ID_PATH = f".//{{{SVG_NAMESPACE}}}*[@id]"
+
+
 def text_to_selectable_paths(svg: ET.Element, inkscape: Inkscape) -> None:
     """
     Converts all <text> elements in an SVG into <paths> with an invisible (but
@@ -26,31 +32,35 @@ def text_to_selectable_paths(svg: ET.Element, inkscape: Inkscape) -> None:
     # Sanity check all <text> have IDs: we'll need these to cross-reference the
     # generated <path>s to the input <text>
     assert all(
-        elem.get("id", None) is not None
-        for elem in svg.findall(f".//{{{SVG_NAMESPACE}}}text")
+        elem.get("id", None) is not None for elem in svg.iter(_SVG_TEXT_TAG)
     ), "All <text> elements must have an id"
 
     # Use Inkscape to produce <path> for all <text>
     with TemporaryDirectory() as tmp_dir:
         tmp_path = Path(tmp_dir)
-        input_file = tmp_path / "input.svg"
         output_file = tmp_path / "output.svg"
 
         # Use Inkscape to convert text to paths
-        with open_etree_in_inkscape(inkscape, svg):
+        with open_etree_in_inkscape(inkscape, svg, tmp_path):
             inkscape.export(output_file, text_to_path=True)
 
         processed_svg = ET.parse(output_file).getroot()
 
+    # Index the generated elements by ID (NB: keeping the first match, as
+    # find() would)
+    processed_elems: dict[str, ET.Element] = {}
+    for elem in processed_svg.iterfind(_ELEMENTS_WITH_ID_PATH):
+        processed_elems.setdefault(elem.attrib["id"], elem)
+
     # Extract the <path> from the Inkscape output and insert into the input SVG
     def process(parent):
         for i, child in reversed(list(enumerate(parent))):
-            if child.tag == f"{{{SVG_NAMESPACE}}}text":
+            if child.tag == _SVG_TEXT_TAG:
                 # Insert the replacement path
                 #
                 # NB: Strip aria-label since we'll be keeping the <text> element
                 id = child.attrib["id"]
-                replacement = processed_svg.find(f".//{{{SVG_NAMESPACE}}}*[@id={id!r}]")
+                replacement = processed_elems[id]
                 replacement.attrib.pop("aria-label", None)
                 parent.insert(i, replacement)
 
@@ -65,9 +75,7 @@ def text_to_selectable_paths(svg: ET.Element, inkscape: Inkscape) -> None:
                 #
                 # NB: The fill/stroke may be set on both the <text> element and
                 # <tspan> we need to override it on all of these.
-                for elem in chain(
-                    [child], child.iterfind(f".//{{{SVG_NAMESPACE}}}tspan")
-                ):
+                for elem in chain([child], child.iter(_SVG_TSPAN_TAG)):
                     style = elem.get("style", "").strip()
                     if style and not style.endswith(";"):
                         style += ";"
@@ -1,6 +1,6 @@
 import pytest
 
-from typing import cast
+from typing import Any, cast
 
 from pdfs import get_pdf
 
@@ -17,6 +17,7 @@ from slidie.render_pdf.pdf import (
     SlidePageInfo,
     setup_outline,
     setup_page_numbering,
+    setup_outline_and_page_numbering,
 )
 
 
@@ -147,3 +148,28 @@ def test_setup_page_numbering(example_slide_page_info: list[SlidePageInfo]) -> N
             5,
             {"/Type": Name.PageLabel, "/S": Name.D, "/St": 2, "/P": "3#"},
         ]
+
+
+def test_setup_outline_and_page_numbering(
+    example_slide_page_info: list[SlidePageInfo],
+) -> None:
+    with Pdf.new() as expected_pdf, Pdf.new() as pdf:
+        for _ in example_slide_page_info:
+            expected_pdf.add_blank_page()
+            pdf.add_blank_page()
+
+        setup_outline(expected_pdf, example_slide_page_info)
+        setup_page_numbering(expected_pdf, example_slide_page_info)
+
+        setup_outline_and_page_numbering(pdf, example_slide_page_info)
+
+        assert pdf.Root.PageLabels.Nums == expected_pdf.Root.PageLabels.Nums
+
+        def flatten(items: list[OutlineItem]) -> list[Any]:
+            return [
+                (item.title, item.destination[0], flatten(item.children))
+                for item in items
+            ]
+
+        with pdf.open_outline() as outline, expected_pdf.open_outline() as expected:
+            assert flatten(outline.root) == flatten(expected.root)
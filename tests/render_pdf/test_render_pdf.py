@@ -7,6 +7,7 @@ from pathlib import Path
 
 from pikepdf import Pdf, Object, Name
 
+from slidie.inkscape import InkscapePool, get_inkscape_version
 from slidie.render_pdf import render_pdf
 
 
@@ -92,3 +93,34 @@ def test_render_pdf(tmp_path: Path) -> None:
 
             assert outline.root[1].children[2].title == "Step 4"
             assert outline.root[1].children[2].destination[0] == pdf.pages[4].obj
+
+
+def test_render_pdf_cache(tmp_path: Path) -> None:
+    src_dir = tmp_path / "src"
+    src_dir.mkdir()
+    cache_dir = tmp_path / "cache"
+
+    shutil.copy(get_svg_filename("simple_build.svg"), src_dir / "1.svg")
+    shutil.copy(get_svg_filename("simple_build.svg"), src_dir / "2.svg")
+    shutil.copy(get_svg_filename("empty.svg"), src_dir / "3.svg")
+    slides = [src_dir / "1.svg", src_dir / "2.svg", src_dir / "3.svg"]
+
+    render_pdf(slides, tmp_path / "first.pdf", cache_dir=cache_dir)
+
+    # One entry per unique slide
+    assert len(list(cache_dir.iterdir())) == 2
+
+    # Should not need Inkscape when everything is cached
+    with InkscapePool(
+        "/dev/null/no-inkscape-here", version=get_inkscape_version()
+    ) as inkscape_pool:
+        render_pdf(
+            slides,
+            tmp_path / "second.pdf",
+            inkscape_pool=inkscape_pool,
+            cache_dir=cache_dir,
+        )
+
+    with Pdf.open(tmp_path / "first.pdf") as first:
+        with Pdf.open(tmp_path / "second.pdf") as second:
+            assert len(first.pages) == len(second.pages) == 4 + 4 + 1
@@ -1,9 +1,56 @@
 import pytest
 
+from typing import Any
+
+import json
+
 from slidie.render_xhtml.browser_magic import (
+    _to_json,
     IFrameMagicParameters,
     normalise_iframe_magic_parameters,
+    guess_video_mimetype,
+)
+
+
+@pytest.mark.parametrize(
+    "value",
+    [
+        None,
+        0,
+        123,
+        -1,
+        1.0,
+        0.5,
+        1e100,
+        float("inf"),
+        float("nan"),
+        True,
+        (),
+        (1,),
+        (1, 2, 3),
+    ],
+)
+def test_to_json(value: Any) -> None:
+    assert _to_json(value) == json.dumps(value)
+
+
+@pytest.mark.parametrize(
+    "url, exp",
+    [
+        ("foo.mp4", "video/mp4"),
+        ("foo.MP4", "video/mp4"),
+        ("foo/bar.webm", "video/webm"),
+        ("http://example.com/foo.mp4", "video/mp4"),
+        ("http://example.com/foo.mp4?bar=baz#t=10", "video/mp4"),
+        ("data:video/mp4;base64,AAAA", "video/mp4"),
+        # Unknown
+        ("foo", None),
+        ("foo.nope", None),
+        ("http://example.com/", None),
+    ],
 )
+def test_guess_video_mimetype(url: str, exp: str | None) -> None:
+    assert guess_video_mimetype(url) == exp
 
 
 class TestNormaliseIFrameParameters:
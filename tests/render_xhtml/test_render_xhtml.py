@@ -6,6 +6,7 @@ from pathlib import Path
 import shutil
 
 
+from slidie.inkscape import InkscapePool, get_inkscape_version
 from slidie.render_xhtml import render_xhtml
 
 
@@ -26,3 +27,29 @@ def test_render_xhtml(tmp_path: Path) -> None:
         ],
         tmp_path / "out.xhtml",
     )
+
+
+def test_render_xhtml_cache(tmp_path: Path) -> None:
+    src_dir = tmp_path / "src"
+    src_dir.mkdir()
+    cache_dir = tmp_path / "cache"
+
+    shutil.copy(get_svg_filename("simple_text.svg"), src_dir / "1.svg")
+    render_xhtml([src_dir / "1.svg"], tmp_path / "first.xhtml", cache_dir=cache_dir)
+    assert len(list(cache_dir.iterdir())) == 1
+
+    # Should not need Inkscape when everything is cached (and the source
+    # filename should be updated)
+    (src_dir / "1.svg").rename(src_dir / "renamed.svg")
+    with InkscapePool(
+        "/dev/null/no-inkscape-here", version=get_inkscape_version()
+    ) as inkscape_pool:
+        render_xhtml(
+            [src_dir / "renamed.svg"],
+            tmp_path / "second.xhtml",
+            inkscape_pool=inkscape_pool,
+            cache_dir=cache_dir,
+        )
+    second = (tmp_path / "second.xhtml").read_text()
+    assert str(src_dir / "renamed.svg") in second
+    assert str(src_dir / "1.svg") not in second
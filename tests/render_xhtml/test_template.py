@@ -129,6 +129,37 @@ def test_inline_template(tmp_path: Path) -> None:
     assert script_elem.text.startswith(nested_script_filename.read_text())
 
 
+def test_inline_template_repeated(tmp_path: Path) -> None:
+    template_filename = tmp_path / "template.xhtml"
+    xhtml_filename = tmp_path / "root.xhtml"
+
+    template_filename.write_text(
+        """
+          <h1 xmlns="http://www.w3.org/1999/xhtml">Hello!</h1>
+        """
+    )
+
+    xhtml_filename.write_text(
+        """
+          <html xmlns="http://www.w3.org/1999/xhtml" lang="en" >
+            <body>
+              <template src="template.xhtml"/>
+              <template src="template.xhtml"/>
+            </body>
+          </html>
+        """
+    )
+
+    root = ET.parse(xhtml_filename).getroot()
+    inline_templates(root, tmp_path, debug=False)
+
+    # Each inclusion should be a separate copy
+    h1_elem_a, h1_elem_b = root.findall(f".//{{{XHTML_NAMESPACE}}}h1")
+    assert h1_elem_a is not h1_elem_b
+    h1_elem_a.text = "Changed"
+    assert h1_elem_b.text == "Hello!"
+
+
 def test_replace_css_paths_with_absolute_file_path(tmp_path: Path) -> None:
     style_filename = tmp_path / "style.css"
     xhtml_filename = tmp_path / "template.xhtml"
@@ -0,0 +1,29 @@
+import pytest
+
+from xml.etree import ElementTree as ET
+
+from slidie.xml_namespaces import SVG_NAMESPACE
+
+from slidie.scripts.placeholders import placeholder_to_image
+
+
+@pytest.mark.parametrize(
+    "placeholder",
+    [
+        '<rect id="placeholder" x="1" y="2" rx="3" ry="4" pathLength="5" />',
+        '<image id="placeholder" x="1" y="2" href="foo.png" preserveAspectRatio="none" />',
+    ],
+)
+def test_placeholder_to_image(placeholder: str) -> None:
+    svg = ET.fromstring(f'<svg xmlns="{SVG_NAMESPACE}">{placeholder}</svg>')
+
+    placeholder_to_image(svg, "placeholder", "data:image/png;base64,AAAA")
+
+    (image,) = svg
+    assert image.tag == f"{{{SVG_NAMESPACE}}}image"
+    assert image.attrib == {
+        "id": "placeholder",
+        "x": "1",
+        "y": "2",
+        "href": "data:image/png;base64,AAAA",
+    }
@@ -8,10 +8,11 @@ from contextlib import chdir
 
 from slidie.scripts.slidie_mv_cmd import (
     FilesNotInSameDirectoryError,
+    GitUpdateIndexError,
     common_parent_directory,
     NumberingParams,
     infer_numbering_parameters,
-    move_file,
+    move_files,
     main,
 )
 
@@ -41,7 +42,7 @@ class TestCommonParentDirectory:
 
 class TestInferNumberingParameters:
     @pytest.mark.parametrize(
-        "filenames, exp",
+        "prefixes, exp",
         [
             (["0"], 1),
             (["1"], 1),
@@ -51,24 +52,22 @@ class TestInferNumberingParameters:
             (["-123"], 4),
         ],
     )
-    def test_num_digits(self, filenames: list[str], exp: int) -> None:
-        assert infer_numbering_parameters(list(map(Path, filenames))).num_digits == exp
+    def test_num_digits(self, prefixes: list[str], exp: int) -> None:
+        assert infer_numbering_parameters(prefixes).num_digits == exp
 
     @pytest.mark.parametrize(
-        "filenames, exp",
+        "prefixes, exp",
         [
             (["0"], False),
             (["1"], False),
             (["-1"], True),
         ],
     )
-    def test_allow_negative(self, filenames: list[str], exp: bool) -> None:
-        assert (
-            infer_numbering_parameters(list(map(Path, filenames))).allow_negative is exp
-        )
+    def test_allow_negative(self, prefixes: list[str], exp: bool) -> None:
+        assert infer_numbering_parameters(prefixes).allow_negative is exp
 
     @pytest.mark.parametrize(
-        "filenames, exp",
+        "prefixes, exp",
         [
             # Clamped at minimum of 10
             (["0"], 10),
@@ -87,14 +86,11 @@ class TestInferNumberingParameters:
             (["000010000"], 10000),
         ],
     )
-    def test_preferred_step_size(self, filenames: list[str], exp: int) -> None:
-        assert (
-            infer_numbering_parameters(list(map(Path, filenames))).preferred_step_size
-            == exp
-        )
+    def test_preferred_step_size(self, prefixes: list[str], exp: int) -> None:
+        assert infer_numbering_parameters(prefixes).preferred_step_size == exp
 
 
-class TestMoveFile:
+class TestMoveFiles:
     @pytest.fixture
     def example_dir(self, tmp_path: Path) -> Iterator[Path]:
         """
@@ -102,22 +98,31 @@ class TestMoveFile:
 
         Will chdir into this directory.
 
-        Three files, a.txt, b.txt and c.txt with 'a.txt' being in git.
+        Files a.txt, b.txt and c.txt in a 'sub' directory with 'a.txt' being
+        in git.
         """
         with chdir(tmp_path):
-            (tmp_path / "a.txt").write_text("a")
-            (tmp_path / "b.txt").write_text("b")
-            (tmp_path / "c.txt").write_text("c")
+            (tmp_path / "sub").mkdir()
+            (tmp_path / "sub" / "a.txt").write_text("a")
+            (tmp_path / "sub" / "b.txt").write_text("b")
+            (tmp_path / "sub" / "c.txt").write_text("c")
 
             run(["git", "init", "."], check=True)
-            run(["git", "add", "a.txt"], check=True)
+            run(["git", "add", "sub/a.txt"], check=True)
             run(["git", "commit", "-m", "initial commit"], check=True)
 
-            yield tmp_path
+            yield tmp_path / "sub"
+
+    def test_empty(self, example_dir: Path) -> None:
+        move_files([])
 
     def test_simple_moves(self, example_dir: Path) -> None:
-        move_file(example_dir / "a.txt", example_dir / "a2.txt")
-        move_file(example_dir / "b.txt", example_dir / "b2.txt")
+        move_files(
+            [
+                (example_dir / "a.txt", example_dir / "a2.txt"),
+                (example_dir / "b.txt", example_dir / "b2.txt"),
+            ]
+        )
 
         # Files were moved
         assert not (example_dir / "a.txt").is_file()
@@ -136,7 +141,7 @@ class TestMoveFile:
         assert (example_dir / "b2.txt").read_text() == "b"
 
     def test_disable_git(self, example_dir: Path) -> None:
-        move_file(example_dir / "a.txt", example_dir / "a2.txt", False)
+        move_files([(example_dir / "a.txt", example_dir / "a2.txt")], False)
 
         # Should delete file in git
         run(["git", "commit", "-a", "-m", "delete file"], check=True)
@@ -144,24 +149,48 @@ class TestMoveFile:
         # Verify this by reverting the commit and checking if the destination
         run(["git", "revert", "HEAD"], check=True)
 
-        assert (example_dir / "a.txt").is_file()
         assert (example_dir / "a.txt").read_text() == "a"
-
-        assert (example_dir / "a2.txt").is_file()
         assert (example_dir / "a2.txt").read_text() == "a"
 
+    def test_not_in_git_repo(self, tmp_path: Path) -> None:
+        (tmp_path / "a.txt").write_text("a")
+
+        move_files([(tmp_path / "a.txt", tmp_path / "a2.txt")])
+
+        assert not (tmp_path / "a.txt").is_file()
+        assert (tmp_path / "a2.txt").read_text() == "a"
+
     def test_destination_exists(self, example_dir: Path) -> None:
-        # Git file
         with pytest.raises(FileExistsError):
-            move_file(example_dir / "a.txt", example_dir / "c.txt")
+            move_files(
+                [
+                    (example_dir / "b.txt", example_dir / "b2.txt"),
+                    (example_dir / "a.txt", example_dir / "c.txt"),
+                ]
+            )
 
-        # Git file (no-git-mode)
-        with pytest.raises(FileExistsError):
-            move_file(example_dir / "a.txt", example_dir / "c.txt", False)
+        # Nothing should have been moved
+        assert (example_dir / "a.txt").is_file()
+        assert (example_dir / "b.txt").is_file()
+        assert not (example_dir / "b2.txt").is_file()
 
-        # Non-git file
-        with pytest.raises(FileExistsError):
-            move_file(example_dir / "b.txt", example_dir / "c.txt")
+    def test_update_index_fails(self, example_dir: Path) -> None:
+        # Lock the index to make updating it fail
+        (example_dir.parent / ".git" / "index.lock").touch()
+
+        with pytest.raises(GitUpdateIndexError):
+            move_files(
+                [
+                    (example_dir / "a.txt", example_dir / "a2.txt"),
+                    (example_dir / "b.txt", example_dir / "b2.txt"),
+                ]
+            )
+
+        # Files should have been moved back
+        assert (example_dir / "a.txt").read_text() == "a"
+        assert (example_dir / "b.txt").read_text() == "b"
+        assert not (example_dir / "a2.txt").is_file()
+        assert not (example_dir / "b2.txt").is_file()
 
 
 class TestCLIApp:
@@ -353,3 +382,7 @@ class TestCLIApp:
     def test_move_relative_to_itself(self, example_dir: Path) -> None:
         with pytest.raises(SystemExit):
             main(["0100.svg", "--after", "0100.svg"])
+
+    def test_move_nonexistent_slide(self, example_dir: Path) -> None:
+        with pytest.raises(SystemExit):
+            main(["0150.svg", "--after", "0100.svg"])
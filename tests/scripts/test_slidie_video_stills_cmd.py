@@ -50,3 +50,36 @@ def test_slidie_video_stills_cmd(
     # Missing video should have been left as-is
     (missing_video_elem,) = svg.findall(".//*[@id='missing_video']")
     assert missing_video_elem.tag == f"{{{SVG_NAMESPACE}}}rect"
+
+
+def test_slidie_video_stills_cmd_no_videos(tmp_path: Path) -> None:
+    slide_svg = tmp_path / "slide.svg"
+    slide_svg.write_bytes(get_svg_filename("layers.svg").read_bytes())
+    mtime = slide_svg.stat().st_mtime_ns
+
+    main([str(slide_svg)])
+
+    # File should not have been rewritten
+    assert slide_svg.read_bytes() == get_svg_filename("layers.svg").read_bytes()
+    assert slide_svg.stat().st_mtime_ns == mtime
+
+
+def test_slidie_video_stills_cmd_duplicate_files(
+    dummy_video: Path, tmp_path: Path, capsys: Any
+) -> None:
+    video_mp4 = tmp_path / "test_video.mp4"
+    video_mp4.write_bytes(dummy_video.read_bytes())
+
+    slide_svg = tmp_path / "slide.svg"
+    slide_svg.write_bytes(get_svg_filename("slidie_video_stills.svg").read_bytes())
+
+    # Same file given several times (via different paths)
+    main([str(slide_svg), str(slide_svg), str(tmp_path / "." / "slide.svg")])
+
+    # The missing video should only be reported once
+    out, err = capsys.readouterr()
+    assert err.count("missing_video.mp4") == 1
+
+    svg = ET.parse(slide_svg).getroot()
+    (test_video_elem,) = svg.findall(".//*[@id='test_video']")
+    assert test_video_elem.tag == f"{{{SVG_NAMESPACE}}}image"
@@ -1,10 +1,15 @@
 import pytest
 
+from io import BytesIO
 from pathlib import Path
 from PIL import Image
 import numpy as np
 
-from slidie.ffmpeg import extract_video_frame, FrameExtractionError
+from slidie.ffmpeg import (
+    extract_video_frame,
+    extract_video_frame_bytes,
+    FrameExtractionError,
+)
 
 
 class TestExtractVideoFrame:
@@ -40,3 +45,42 @@ class TestExtractVideoFrame:
         out = tmp_path / "out.png"
         with pytest.raises(FrameExtractionError):
             extract_video_frame(bad, out)
+
+    def test_jpeg(self, dummy_video: Path, tmp_path: Path) -> None:
+        out = tmp_path / "out.jpg"
+        extract_video_frame(dummy_video, out)
+
+        im = Image.open(out)
+        assert im.format == "JPEG"
+        assert np.array(im).shape == (100, 200, 3)
+
+    def test_unsupported_suffix(self, tmp_path: Path) -> None:
+        with pytest.raises(ValueError):
+            extract_video_frame(tmp_path / "in.mp4", tmp_path / "out.gif")
+
+
+class TestExtractVideoFrameBytes:
+    @pytest.mark.parametrize("time", [0.0, 5.0, 100.0])
+    def test_time_in_range(self, dummy_video: Path, time: float) -> None:
+        png = extract_video_frame_bytes(dummy_video, time)
+
+        im = np.array(Image.open(BytesIO(png)))
+
+        # Is full size
+        assert im.shape == (100, 200, 3)
+
+        # Is blue
+        assert np.all(np.isclose(im, (0, 0, 255), atol=5))
+
+    def test_jpeg(self, dummy_video: Path) -> None:
+        jpeg = extract_video_frame_bytes(dummy_video, jpeg=True)
+
+        im = Image.open(BytesIO(jpeg))
+        assert im.format == "JPEG"
+        assert np.array(im).shape == (100, 200, 3)
+
+    def test_bad_input(self, tmp_path: Path) -> None:
+        bad = tmp_path / "bad.mp4"
+        bad.touch()
+        with pytest.raises(FrameExtractionError):
+            extract_video_frame_bytes(bad)
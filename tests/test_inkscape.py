@@ -9,7 +9,23 @@ import numpy as np
 from svgs import get_svg_filename
 
 from slidie.xml_namespaces import SVG_NAMESPACE, SLIDIE_NAMESPACE
-from slidie.inkscape import Inkscape, InkscapeError, FileOpenError
+from slidie.inkscape import (
+    Inkscape,
+    InkscapeError,
+    FileOpenError,
+    InkscapePool,
+    get_inkscape_version,
+)
+
+
+def test_get_inkscape_version() -> None:
+    assert get_inkscape_version().startswith("Inkscape ")
+
+
+def test_inkscape_pool_explicit_version() -> None:
+    # Inkscape must not be run when the version is given
+    with InkscapePool("/dev/null/no-inkscape-here", version="Inkscape 9.9") as pool:
+        assert pool.version == "Inkscape 9.9"
 
 
 class TestInkscape:
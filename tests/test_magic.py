@@ -3,6 +3,7 @@ import pytest
 from svgs import get_svg
 
 from textwrap import dedent
+import tomllib
 
 from slidie.magic import (
     extract_magic,
@@ -11,9 +12,38 @@ from slidie.magic import (
     TooMuchMagicError,
     SingleRectOrImageExpectedError,
     get_magic_rectangle,
+    _parse_toml,
 )
 
 
+@pytest.mark.parametrize(
+    "text",
+    [
+        # Simple form
+        'foo = "bar"',
+        'foo="bar"\n',
+        '\tfoo-bar_123 =\t"baz qux"  \n\n',
+        '123 = ""',
+        'foo = "\tbar"',
+        # Not the simple form
+        'foo = "bar\\nbaz"',
+        "foo = 'bar'",
+        'foo = """bar"""',
+        'foo = "bar" # Comment',
+        '"foo" = "bar"',
+        'foo.bar = "baz"',
+        "foo = 123",
+    ],
+)
+def test_parse_toml(text: str) -> None:
+    assert _parse_toml(text) == tomllib.loads(text)
+
+
+def test_parse_toml_invalid() -> None:
+    with pytest.raises(tomllib.TOMLDecodeError):
+        _parse_toml('foo = "bar\x01"')
+
+
 class TestExtractMagic:
     def test_invalid_toml(self) -> None:
         svg = get_svg("invalid_toml_magic.svg")
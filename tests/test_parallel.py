@@ -0,0 +1,43 @@
+import pytest
+
+import threading
+from threading import Barrier
+
+from slidie.parallel import parallel_map
+
+
+@pytest.mark.parametrize("jobs", [None, 1, 2, 100])
+def test_parallel_map(jobs: int | None) -> None:
+    assert parallel_map(pow, range(10), [2] * 10, jobs=jobs) == [
+        n**2 for n in range(10)
+    ]
+
+
+def test_parallel_map_empty() -> None:
+    assert parallel_map(str, [], jobs=4) == []
+
+
+def test_parallel_map_single_job_runs_on_calling_thread() -> None:
+    assert (
+        parallel_map(lambda _: threading.get_ident(), range(3), jobs=1)
+        == [threading.get_ident()] * 3
+    )
+
+
+def test_parallel_map_concurrent() -> None:
+    # Would deadlock (and timeout) if not run concurrently
+    barrier = Barrier(3, timeout=10)
+    assert (
+        parallel_map(lambda n: barrier.wait() is not None, range(3), jobs=3)
+        == [True] * 3
+    )
+
+
+def test_parallel_map_exception() -> None:
+    def fn(n: int) -> int:
+        if n == 5:
+            raise ValueError(n)
+        return n
+
+    with pytest.raises(ValueError):
+        parallel_map(fn, range(10), jobs=2)
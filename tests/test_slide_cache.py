@@ -0,0 +1,85 @@
+from pathlib import Path
+from xml.etree import ElementTree as ET
+
+from slidie.xml_namespaces import SVG_NAMESPACE, SODIPODI_NAMESPACE, XLINK_NAMESPACE
+from slidie.slide_cache import get_cache_key, find_linked_files, write_cache_entry
+
+
+def test_get_cache_key() -> None:
+    key = get_cache_key(b"<svg/>", "test-1")
+
+    # Deterministic
+    assert get_cache_key(b"<svg/>", "test-1") == key
+
+    # Sensitive to both content and format
+    assert get_cache_key(b"<svg />", "test-1") != key
+    assert get_cache_key(b"<svg/>", "test-2") != key
+
+    # Usable as a filename
+    assert key.isalnum()
+
+
+def test_get_cache_key_inkscape_version() -> None:
+    key = get_cache_key(b"<svg/>", "test-1", "Inkscape 1.0")
+    assert get_cache_key(b"<svg/>", "test-1", "Inkscape 1.0") == key
+    assert get_cache_key(b"<svg/>", "test-1", "Inkscape 1.1") != key
+
+
+def test_get_cache_key_linked_files(tmp_path: Path) -> None:
+    image = tmp_path / "image.png"
+    missing = tmp_path / "missing.png"
+
+    # Missing files are still distinguished
+    missing_key = get_cache_key(b"<svg/>", "test-1", "", [image])
+    assert get_cache_key(b"<svg/>", "test-1", "", [missing]) != missing_key
+
+    image.write_bytes(b"foo")
+    foo_key = get_cache_key(b"<svg/>", "test-1", "", [image])
+    assert foo_key != missing_key
+    assert get_cache_key(b"<svg/>", "test-1", "", [image]) == foo_key
+
+    # Sensitive to content
+    image.write_bytes(b"bar")
+    assert get_cache_key(b"<svg/>", "test-1", "", [image]) != foo_key
+
+
+def test_find_linked_files(tmp_path: Path) -> None:
+    svg = ET.fromstring(
+        f"""
+            <svg
+                xmlns="{SVG_NAMESPACE}"
+                xmlns:xlink="{XLINK_NAMESPACE}"
+                xmlns:sodipodi="{SODIPODI_NAMESPACE}"
+            >
+                <image href="a.png" />
+                <image xlink:href="sub/b%20c.png" sodipodi:absref="/abs/b c.png" />
+                <image href="file:///abs/d.png" />
+                <image href="data:image/png;base64,AAAA" />
+                <image href="https://example.com/e.png" />
+                <use href="#foo" />
+            </svg>
+        """
+    )
+    assert find_linked_files(svg, tmp_path) == [
+        tmp_path / "a.png",
+        tmp_path / "sub" / "b c.png",
+        Path("/abs/b c.png"),
+        Path("/abs/d.png"),
+    ]
+
+
+def test_write_cache_entry(tmp_path: Path) -> None:
+    entry = tmp_path / "cache" / "entry"
+    (tmp_path / "src.txt").write_bytes(b"Copied")
+
+    write_cache_entry(entry, {"a.txt": b"Hello", "b.txt": tmp_path / "src.txt"})
+    assert (entry / "a.txt").read_bytes() == b"Hello"
+    assert (entry / "b.txt").read_bytes() == b"Copied"
+
+    # Existing entries are left alone
+    write_cache_entry(entry, {"a.txt": b"World"})
+    assert (entry / "a.txt").read_bytes() == b"Hello"
+    assert (entry / "b.txt").read_bytes() == b"Copied"
+
+    # No temporary files left behind
+    assert list(entry.parent.iterdir()) == [entry]
@@ -4,13 +4,16 @@ from svgs import get_svg
 
 import json
 from itertools import zip_longest
+from xml.etree import ElementTree as ET
 
-from slidie.xml_namespaces import SLIDIE_NAMESPACE, SVG_NAMESPACE
+from slidie.xml_namespaces import SLIDIE_NAMESPACE, SVG_NAMESPACE, INKSCAPE_NAMESPACE
 
 from slidie.svg_utils import (
+    InkscapeLayer,
     enumerate_inkscape_layers,
     iter_layers,
     get_inkscape_layer_name,
+    build_parent_map,
     enumerate_elem_parents,
     get_elem_inksape_layers,
     annotate_build_steps,
@@ -22,11 +25,46 @@ from slidie.svg_utils import (
     ViewBox,
     get_view_box,
     get_inkscape_pages,
+    fill_inkscape_page_background,
     extract_multiline_text,
     find_text_with_prefix,
+    find_text_with_prefixes,
 )
 
 
+def test_inkscape_layer_repr() -> None:
+    def layer(name: str, *children: InkscapeLayer) -> InkscapeLayer:
+        elem = ET.Element(f"{{{SVG_NAMESPACE}}}g")
+        elem.set(f"{{{INKSCAPE_NAMESPACE}}}label", name)
+        return InkscapeLayer(elem, list(children))
+
+    assert repr(layer("a")) == "<InkscapeLayer 'a'>"
+    assert repr(layer("a", layer("b"), layer("c"))) == (
+        "<InkscapeLayer 'a' [<InkscapeLayer 'b'>, <InkscapeLayer 'c'>]>"
+    )
+
+    # Long lists of layers are elided
+    many = repr(layer("a", *(layer(str(n)) for n in range(100))))
+    assert "'5'" in many
+    assert "'99'" not in many
+    assert "..." in many
+
+    # Each level of nesting counts once towards the depth limit
+    nested = repr(layer("a", layer("b", layer("c", layer("d", layer("e"))))))
+    assert nested == (
+        "<InkscapeLayer 'a' [<InkscapeLayer 'b' [<InkscapeLayer 'c' "
+        "[<InkscapeLayer 'd' [<InkscapeLayer 'e'>]>]>]>]>"
+    )
+
+    # Very deeply nested layers are elided
+    deep = layer("0")
+    for n in range(1, 20):
+        deep = layer(str(n), deep)
+    assert "'19'" in repr(deep)
+    assert "'0'" not in repr(deep)
+    assert "..." in repr(deep)
+
+
 def test_enumerate_inkscape_layers() -> None:
     root = get_svg("layers.svg")
     layers = enumerate_inkscape_layers(root)
@@ -82,6 +120,27 @@ def test_enumerate_elem_parents() -> None:
         assert child in parent
 
 
+def test_build_parent_map() -> None:
+    root = get_svg("nested_element.svg")
+    parent_map = build_parent_map(root)
+
+    assert root not in parent_map
+    for elem in root.iter():
+        for child in elem:
+            assert parent_map[child] is elem
+
+
+def test_enumerate_elem_parents_parent_map() -> None:
+    root = get_svg("nested_element.svg")
+
+    elem = root.find(f".//*[@id='elem']")
+    assert elem is not None
+
+    assert enumerate_elem_parents(
+        root, elem, build_parent_map(root)
+    ) == enumerate_elem_parents(root, elem)
+
+
 def test_elem_inkscape_layers() -> None:
     root = get_svg("nested_element.svg")
 
@@ -89,6 +148,10 @@ def test_elem_inkscape_layers() -> None:
     assert elem is not None
 
     assert get_elem_inksape_layers(root, elem) == ("outer", "inner")
+    assert get_elem_inksape_layers(root, elem, build_parent_map(root)) == (
+        "outer",
+        "inner",
+    )
 
 
 def test_annotate_build_steps() -> None:
@@ -146,6 +209,7 @@ def test_get_build_step_range(filename: str, exp: range) -> None:
     svg = get_svg(filename)
     annotate_build_steps(svg)
     assert get_build_step_range(svg) == exp
+    assert get_build_step_range(svg, find_build_elements(svg)) == exp
 
 
 @pytest.mark.parametrize(
@@ -166,6 +230,7 @@ def test_get_build_tags(filename: str, exp: range) -> None:
     svg = get_svg(filename)
     annotate_build_steps(svg)
     assert get_build_tags(svg) == exp
+    assert get_build_tags(svg, find_build_elements(svg)) == exp
 
 
 def test_get_visible_build_steps() -> None:
@@ -210,6 +275,30 @@ class TestGetInkscapePages:
         assert get_inkscape_pages(get_svg("old_inkscape_file.svg")) == []
 
 
+def test_fill_inkscape_page_background() -> None:
+    svg = get_svg("multiple_pages.svg")
+    page_colour = get_inkscape_page_colour(svg)
+    fill_inkscape_page_background(svg)
+
+    # One rect per distinct page (the first page coincides with the viewBox),
+    # inserted in a deterministic order
+    rects = [
+        (
+            elem.get("x"),
+            elem.get("y"),
+            elem.get("width"),
+            elem.get("height"),
+            elem.get("style"),
+        )
+        for elem in svg
+        if elem.tag == f"{{{SVG_NAMESPACE}}}rect"
+    ]
+    assert rects == [
+        ("50.0", "20.0", "50.0", "60.0", f"fill:{page_colour}"),
+        ("10.0", "20.0", "30.0", "40.0", f"fill:{page_colour}"),
+    ]
+
+
 @pytest.mark.parametrize(
     "svg, exp",
     [
@@ -278,3 +367,30 @@ def test_find_text_with_prefix() -> None:
         for parent, child in zip(elems[:-1], elems[1:]):
             assert child in parent
         assert elems[-1].tag == f"{{{SVG_NAMESPACE}}}text"
+
+
+def test_find_text_with_prefix_skips_non_rendered_containers() -> None:
+    svg = ET.fromstring(
+        f"""
+            <svg xmlns="{SVG_NAMESPACE}">
+                <defs><text>###\nIn defs</text></defs>
+                <clipPath><text>###\nIn clip path</text></clipPath>
+                <g><text>###\nIn group</text></g>
+            </svg>
+        """
+    )
+    assert [text for _elems, text in find_text_with_prefix(svg, "###\n")] == [
+        "In group"
+    ]
+
+
+def test_find_text_with_prefixes() -> None:
+    svg = get_svg("example_magic.svg")
+
+    found = find_text_with_prefixes(svg, ["@@@\n", "@@", "no-such-prefix"])
+    assert found == {
+        "@@@\n": list(find_text_with_prefix(svg, "@@@\n")),
+        "@@": [],  # All matches listed under earlier prefix
+        "no-such-prefix": [],
+    }
+    assert len(found["@@@\n"]) > 0